@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Helix Native Preset Benchmarks
+Times each processing stage against the bundled setlists and synthetically
+scaled copies of them, and writes the results as JSON for later comparison.
+
+Usage:
+    python3 benchmark.py
+    python3 benchmark.py --scales 1,10,100,1000 --json bench.json
+    python3 benchmark.py --stages parse_hls_setlist,export_csv --repeat 5
+    python3 benchmark.py --json after.json --compare before.json
+
+Each stage runs in a fresh worker process so its peak RSS is its own. Wall
+time is the best of --repeat runs; allocations are measured on a separate
+run under tracemalloc, which would otherwise slow the timed runs down.
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import base64
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+import helix_parser as hp
+
+BENCH_FORMAT = 1
+HERE = Path(__file__).resolve().parent
+BUNDLED_SETLISTS = ('FACTORY 1.hls', 'FACTORY 2.hls', 'TEMPLATES.hls')
+DEFAULT_SCALES = (1, 10, 100, 1000)
+# Placeholder for the streamed payload when writing a scaled setlist's envelope
+_ENCODED_MARK = '\0encoded_data\0'
+
+
+# ─── Scaled Libraries ───
+
+def write_scaled_setlist(src, scale, dirpath):
+    """Write a copy of setlist `src` with its presets repeated `scale` times; return its path.
+
+    The payload is compressed and base64-encoded as it is written, so only
+    the source setlist is ever held in memory.
+    """
+    if scale == 1:
+        return str(src)
+    with open(src, 'r') as f:
+        envelope = json.load(f)
+    setlist_name, presets = hp.load_setlist(src)
+    items = [json.dumps(p) for p in presets]
+    envelope['encoded_data'] = _ENCODED_MARK
+    head, tail = json.dumps(envelope).split(json.dumps(_ENCODED_MARK))
+    out = os.path.join(dirpath, f"{Path(src).stem} x{scale}.hls")
+    with open(out, 'w') as f:
+        f.write(head + '"')
+        z = zlib.compressobj()
+        pending = b''
+
+        def emit(data):
+            nonlocal pending
+            pending += data
+            cut = len(pending) - len(pending) % 3
+            f.write(base64.b64encode(pending[:cut]).decode('ascii'))
+            pending = pending[cut:]
+
+        emit(z.compress(f'{{"meta": {json.dumps({"name": setlist_name})}, "presets": ['.encode('utf-8')))
+        for n in range(scale):
+            emit(z.compress(((', ' if n else '') + ', '.join(items)).encode('utf-8')))
+        emit(z.compress(b']}') + z.flush())
+        f.write(base64.b64encode(pending).decode('ascii') + '"' + tail)
+    return out
+
+
+# ─── Stages ───
+# Each stage is a (setup, run) pair. setup(files, workdir) prepares the
+# stage's input outside the measurement; run(state) is what gets measured.
+# run() returns what it built so the allocation figures include its output.
+
+def _raw_presets(files):
+    return [p for fp in files for p in hp.load_setlist(fp)[1]]
+
+
+def _entries(files):
+    return [e for fp in files for e in hp.parse_hls_setlist(fp)]
+
+
+def _parsed(files):
+    return [hp.parse_preset(None, override_data=w, setlist_name=name, setlist_index=i)
+            for w, name, i in _entries(files)]
+
+
+def _run_parse_hls_setlist(files):
+    out = []
+    for fp in files:
+        hp.clear_setlist_memo()
+        out.append(hp.parse_hls_setlist(fp))
+    return out
+
+
+def _run_parse_preset(entries):
+    return [hp.parse_preset(None, override_data=w, setlist_name=name, setlist_index=i)
+            for w, name, i in entries]
+
+
+def _run_extract_blocks(raw):
+    return [hp.extract_blocks(p) for p in raw]
+
+
+def _setup_latex(files, workdir):
+    setlist_data = []
+    for fp in files:
+        _, infos, blocks = hp.load_parsed_setlist(fp, cache_dir=None)
+        presets = list(zip(infos, blocks))
+        setlist_data.append((Path(fp).stem, presets,
+                             [("All Presets", 0, len(presets), "All presets in this setlist.")]))
+    return setlist_data, os.path.join(workdir, 'bench.tex')
+
+
+def _run_latex(state):
+    from generate_latex import generate_latex
+    return generate_latex(*state)
+
+
+STAGES = {
+    'parse_hls_setlist': (lambda files, workdir: files, _run_parse_hls_setlist),
+    'parse_preset': (lambda files, workdir: _entries(files), _run_parse_preset),
+    'extract_blocks': (lambda files, workdir: _raw_presets(files), _run_extract_blocks),
+    'export_csv': (lambda files, workdir: (_parsed(files), os.path.join(workdir, 'bench.csv')),
+                   lambda state: hp.export_csv(*state)),
+    'export_xlsx': (lambda files, workdir: (_parsed(files), os.path.join(workdir, 'bench.xlsx')),
+                    lambda state: hp.export_xlsx(*state)),
+    'generate_latex': (_setup_latex, _run_latex),
+}
+# Stages that need an optional dependency, skipped when it is missing
+STAGE_REQUIRES = {'export_xlsx': 'openpyxl'}
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _bench_stage(job):
+    """Worker: set up and measure one stage on one library; return a result dict."""
+    stage, files, workdir, repeat = job
+    setup, run = STAGES[stage]
+    result = {'stage': stage, 'files': [Path(f).name for f in files]}
+    module = STAGE_REQUIRES.get(stage)
+    if module:
+        try:
+            __import__(module)
+        except ImportError:
+            result['skipped'] = f"{module} not installed"
+            return result
+
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        state = setup(files, workdir)
+        result['setup_rss_kb'] = _peak_rss_kb()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = run(state)
+            times.append(time.perf_counter() - start)
+            del out
+        result['peak_rss_kb'] = _peak_rss_kb()
+
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.start()
+        out = run(state)
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Objects the stage built and still holds
+        result['alloc_blocks'] = sys.getallocatedblocks() - blocks_before
+        del out
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    result['wall_s'] = min(times)
+    result['wall_all_s'] = times
+    result['alloc_peak_bytes'] = alloc_peak
+    return result
+
+
+# ─── Reporting ───
+
+def print_results(results, baseline=None):
+    """Print a results table, with wall-time ratios against a previous run if given."""
+    before = {}
+    if baseline:
+        before = {(r['stage'], r['scale']): r for r in baseline['results'] if 'wall_s' in r}
+    print(f"{'Stage':<18} {'Scale':>6} {'Presets':>8} {'Wall (s)':>10} "
+          f"{'Peak RSS (MB)':>14} {'Alloc peak (MB)':>16}" + ("  vs. baseline" if baseline else ""))
+    print('─' * (76 + (14 if baseline else 0)))
+    for r in results:
+        head = f"{r['stage']:<18} {r['scale']:>5}x {r['presets']:>8}"
+        if 'skipped' in r:
+            print(f"{head}  skipped: {r['skipped']}")
+            continue
+        rss = f"{r['peak_rss_kb'] / 1024:14.1f}" if r['peak_rss_kb'] is not None else f"{'n/a':>14}"
+        line = f"{head} {r['wall_s']:10.4f} {rss} {r['alloc_peak_bytes'] / 2**20:16.1f}"
+        old = before.get((r['stage'], r['scale']))
+        if old:
+            line += f"  {r['wall_s'] / old['wall_s']:6.2f}x"
+        print(line)
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=None, repeat=3, setlists=None):
+    """Run every stage at every scale and return the JSON-ready report dict."""
+    stages = list(stages or STAGES)
+    setlists = [str(HERE / name) for name in BUNDLED_SETLISTS] if setlists is None else setlists
+    results = []
+    with tempfile.TemporaryDirectory(prefix='helix-bench-') as workdir:
+        for scale in scales:
+            files = [write_scaled_setlist(fp, scale, workdir) for fp in setlists]
+            presets = sum(1 for fp in files for _ in hp.scan_hls_names(fp))
+            hp.clear_setlist_memo()
+            for stage in stages:
+                # A fresh process per stage keeps peak RSS figures independent
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                    r = pool.submit(_bench_stage, (stage, files, workdir, repeat)).result()
+                r['scale'] = scale
+                r['presets'] = presets
+                results.append(r)
+                print(f"  {stage} at {scale}x done", file=sys.stderr)
+    return {
+        'format': BENCH_FORMAT,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def main():
+    scales = DEFAULT_SCALES
+    stages = None
+    repeat = 3
+    json_out = None
+    baseline = None
+    i = 1
+    try:
+        while i < len(sys.argv):
+            arg = sys.argv[i]
+            if arg == '--scales' and i + 1 < len(sys.argv):
+                scales = [int(s) for s in sys.argv[i + 1].split(',')]
+                i += 2
+            elif arg == '--stages' and i + 1 < len(sys.argv):
+                stages = sys.argv[i + 1].split(',')
+                unknown = [s for s in stages if s not in STAGES]
+                if unknown:
+                    print(f"Error: unknown stage(s) {', '.join(unknown)}; "
+                          f"choose from {', '.join(STAGES)}")
+                    sys.exit(1)
+                i += 2
+            elif arg == '--repeat' and i + 1 < len(sys.argv):
+                repeat = max(1, int(sys.argv[i + 1]))
+                i += 2
+            elif arg == '--json' and i + 1 < len(sys.argv):
+                json_out = sys.argv[i + 1]
+                i += 2
+            elif arg == '--compare' and i + 1 < len(sys.argv):
+                with open(sys.argv[i + 1], 'r') as f:
+                    baseline = json.load(f)
+                i += 2
+            else:
+                print("Usage: python3 benchmark.py [--scales 1,10,100] [--stages a,b] "
+                      "[--repeat N] [--json out.json] [--compare old.json]")
+                print(f"  stages: {', '.join(STAGES)}")
+                sys.exit(1)
+    except ValueError:
+        print(f"Error: {sys.argv[i]} expects a number (or comma-separated numbers)")
+        sys.exit(1)
+
+    report = run_benchmarks(scales, stages, repeat)
+    print_results(report['results'], baseline)
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {json_out}")
+
+
+if __name__ == '__main__':
+    main()
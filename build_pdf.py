@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Helix Native Reference PDF Builder
+Generates the LaTeX reference from .hls setlists and compiles it to PDF,
+running the TeX engine only as many times as the document needs.
+
+Usage:
+    python3 build_pdf.py "FACTORY 1.hls" "FACTORY 2.hls" TEMPLATES.hls \\
+        -o "Helix Native Presets.pdf" --tex "Helix Native Presets.tex"
+    python3 build_pdf.py *.hls -o preview.pdf --split --jobs 0
+
+longtable column widths, the table of contents and hyperref bookmarks all
+live in auxiliary files that each pass rewrites; the build stops as soon as
+a pass leaves them unchanged. The auxiliary files are kept in the cache
+directory between builds, so an unchanged or lightly edited document
+usually converges in a single pass.
+
+--split compiles every setlist as its own document in parallel and merges
+the results with pdfpages. It is meant for fast previews: each setlist gets
+its own contents and indices, and links between setlists are lost.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from helix_parser import DEFAULT_CACHE_DIR
+from generate_latex import generate_latex, load_setlist_data
+
+DEFAULT_ENGINE = 'pdflatex'
+MAX_PASSES = 5
+# Files a pass reads back on the next one; the document has converged once
+# a pass leaves all of them unchanged
+AUX_SUFFIXES = ('.aux', '.toc', '.out')
+
+# The parts' digests go in a comment so the merge reruns when any part changes
+MERGE_TEMPLATE = r"""%% parts: %s
+\documentclass{article}
+\usepackage{pdfpages}
+\begin{document}
+%s
+\end{document}
+"""
+
+
+class BuildError(Exception):
+    """The TeX engine failed; the message holds the end of its log."""
+
+
+def _file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _aux_state(build_dir, jobname):
+    return tuple(_file_digest(os.path.join(build_dir, jobname + s)) for s in AUX_SUFFIXES)
+
+
+def _run_engine(engine, tex_path, build_dir, jobname):
+    cmd = [engine, '-interaction=nonstopmode', '-halt-on-error',
+           f'-output-directory={build_dir}', f'-jobname={jobname}', os.path.abspath(tex_path)]
+    proc = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(tex_path)),
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        tail = proc.stdout.decode('utf-8', 'replace').splitlines()[-20:]
+        raise BuildError(f"{engine} failed on {tex_path}:\n" + '\n'.join(tail))
+
+
+def compile_tex(tex_path, build_dir, engine=DEFAULT_ENGINE, max_passes=MAX_PASSES):
+    """Compile tex_path into build_dir until its auxiliary files converge.
+
+    Returns (pdf path, passes run). When build_dir already holds the PDF of
+    an identical .tex from a converged earlier build, no pass is run.
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    jobname = os.path.splitext(os.path.basename(tex_path))[0]
+    pdf_path = os.path.join(build_dir, jobname + '.pdf')
+    stamp_path = os.path.join(build_dir, jobname + '.built')
+
+    tex_digest = _file_digest(tex_path)
+    try:
+        with open(stamp_path, 'r') as f:
+            built = f.read().strip()
+    except OSError:
+        built = None
+    if built == tex_digest and os.path.exists(pdf_path):
+        return pdf_path, 0
+
+    if os.path.exists(stamp_path):
+        os.remove(stamp_path)
+    state = _aux_state(build_dir, jobname)
+    for passes in range(1, max_passes + 1):
+        _run_engine(engine, tex_path, build_dir, jobname)
+        new_state = _aux_state(build_dir, jobname)
+        if new_state == state:
+            with open(stamp_path, 'w') as f:
+                f.write(tex_digest)
+            return pdf_path, passes
+        state = new_state
+    print(f"Warning: {tex_path} did not converge in {max_passes} passes; "
+          f"cross-references may be stale")
+    return pdf_path, max_passes
+
+
+def merge_pdfs(pdf_paths, build_dir, engine=DEFAULT_ENGINE):
+    """Concatenate PDFs into one with the pdfpages package; return its path."""
+    tex_path = os.path.join(build_dir, 'merged.tex')
+    pages = '\n'.join(r'\includepdf[pages=-]{' + os.path.abspath(p).replace('\\', '/') + '}'
+                      for p in pdf_paths)
+    digests = ' '.join(_file_digest(p)[:16] for p in pdf_paths)
+    with open(tex_path, 'w') as f:
+        f.write(MERGE_TEMPLATE % (digests, pages))
+    # Only one pass: pdfpages writes nothing the merge reads back
+    return compile_tex(tex_path, build_dir, engine, max_passes=1)[0]
+
+
+def build_dir_for(cache_dir, pdf_path):
+    """Return the persistent build directory for an output PDF."""
+    doc = hashlib.sha256(os.path.abspath(pdf_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'pdf', doc)
+
+
+def build_pdf(setlist_data, pdf_path, build_dir, engine=DEFAULT_ENGINE,
+              cache_dir=None, split=False, jobs=1, tex_out=None):
+    """Write the LaTeX for setlist_data and compile it to pdf_path.
+
+    With split=True each setlist is compiled as its own document, up to
+    `jobs` at a time, and the results are merged. tex_out, if given, gets a
+    copy of the full document's .tex (split builds of several setlists
+    generate it on its own, as they never render it). Returns the number of
+    engine passes run per document, keyed by .tex name.
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    if split:
+        docs = []
+        for i, setlist in enumerate(setlist_data):
+            tex_path = os.path.join(build_dir, f"{stem}-part{i + 1}.tex")
+            generate_latex([setlist], tex_path, cache_dir)
+            docs.append(tex_path)
+    else:
+        tex_path = os.path.join(build_dir, stem + '.tex')
+        generate_latex(setlist_data, tex_path, cache_dir)
+        docs = [tex_path]
+    if tex_out:
+        if split and len(docs) > 1:
+            # The parts are separate documents; only here is the full one needed
+            generate_latex(setlist_data, tex_out, cache_dir)
+        elif _file_digest(docs[0]) != _file_digest(tex_out):
+            # Left untouched when unchanged, as generate_latex() does
+            shutil.copyfile(docs[0], tex_out)
+
+    # Each engine run is its own process, so threads are enough to overlap them
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(lambda t: compile_tex(t, build_dir, engine), docs))
+
+    pdfs = [pdf for pdf, _ in results]
+    merged = merge_pdfs(pdfs, build_dir, engine) if split and len(pdfs) > 1 else pdfs[0]
+    shutil.copyfile(merged, pdf_path)
+    return {os.path.basename(t): passes for t, (_, passes) in zip(docs, results)}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 build_pdf.py <setlist1.hls> [setlist2.hls ...] [-o output.pdf]"
+              " [--tex output.tex] [--engine pdflatex] [--split] [--jobs N]"
+              " [--cache-dir DIR] [--no-cache]")
+        sys.exit(1)
+
+    hls_files = []
+    pdf_path = 'helix_reference.pdf'
+    tex_out = None
+    engine = DEFAULT_ENGINE
+    cache_dir = DEFAULT_CACHE_DIR
+    split = False
+    jobs = 1
+    i = 1
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == '-o' and i + 1 < len(sys.argv):
+            pdf_path = sys.argv[i + 1]
+            i += 2
+        elif arg == '--tex' and i + 1 < len(sys.argv):
+            tex_out = sys.argv[i + 1]
+            i += 2
+        elif arg == '--engine' and i + 1 < len(sys.argv):
+            engine = sys.argv[i + 1]
+            i += 2
+        elif arg == '--cache-dir' and i + 1 < len(sys.argv):
+            cache_dir = sys.argv[i + 1]
+            i += 2
+        elif arg == '--no-cache':
+            cache_dir = None
+            i += 1
+        elif arg == '--split':
+            split = True
+            i += 1
+        elif arg == '--jobs' and i + 1 < len(sys.argv):
+            try:
+                jobs = int(sys.argv[i + 1]) or os.cpu_count() or 1
+            except ValueError:
+                print(f"Error: --jobs expects a number, got {sys.argv[i + 1]}")
+                sys.exit(1)
+            i += 2
+        else:
+            hls_files.append(arg)
+            i += 1
+
+    if shutil.which(engine) is None:
+        print(f"Error: {engine} not found. Install a LaTeX distribution such as TeX Live or MiKTeX.")
+        sys.exit(1)
+
+    setlist_data = load_setlist_data(hls_files, cache_dir)
+    print(f"Building: {pdf_path}")
+    try:
+        if cache_dir:
+            passes = build_pdf(setlist_data, pdf_path, build_dir_for(cache_dir, pdf_path),
+                               engine, cache_dir, split, jobs, tex_out)
+        else:
+            with tempfile.TemporaryDirectory(prefix='helix-pdf-') as build_dir:
+                passes = build_pdf(setlist_data, pdf_path, build_dir, engine, None, split, jobs,
+                                   tex_out)
+    except BuildError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for tex_name, n in passes.items():
+        print(f"  {tex_name}: {n} pass{'es' if n != 1 else ''}"
+              + (" (unchanged)" if n == 0 else ""))
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,20 @@ Helix Native Factory Preset LaTeX Document Generator
 Parses multiple .hls setlist files and generates a combined LaTeX reference.
 """
 
-import json, base64, zlib, re, sys, os
-import importlib.util
+import sys, os
+import hashlib
+import re
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-spec = importlib.util.spec_from_file_location('helix_parser', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'helix_parser.py'))
-_mod = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(_mod)
-MODEL_DB = _mod.MODEL_DB
+from helix_parser import (MANUFACTURERS, DEFAULT_CACHE_DIR, load_parsed_setlist, manufacturer,
+                          write_cache_entry)
 
 # ═══════════════════════════════════════════════════════════════
 # PRESET DECODER: preset_name -> (decoded_name, description)
+# helix_search_index.json is built from this and the tables below;
+# run helix_search.py --build after editing them.
 # ═══════════════════════════════════════════════════════════════
 
 PRESET_INFO = {
@@ -803,74 +807,34 @@ PRESET_PICKUPS = {
 }
 
 
-def parse_hls(filepath):
-    with open(filepath, 'r') as f:
-        hls = json.load(f)
-    decoded = base64.b64decode(hls['encoded_data'])
-    decompressed = zlib.decompress(decoded)
-    data = json.loads(decompressed)
-    return data if isinstance(data, list) else data.get('presets', [])
-
-
-def extract_blocks(preset):
-    tone = preset.get('tone', {})
-    blocks = []
-    for dsp_key in ['dsp0', 'dsp1']:
-        dsp = tone.get(dsp_key, {})
-        if not isinstance(dsp, dict):
-            continue
-        for bk in sorted(dsp.keys()):
-            if not bk.startswith('block') and not bk.startswith('cab'):
-                continue
-            bv = dsp[bk]
-            if not isinstance(bv, dict) or '@model' not in bv:
-                continue
-            model_id = bv['@model']
-            enabled = bv.get('@enabled', True)
-            info = MODEL_DB.get(model_id, None)
-            if info is None:
-                category, l6_name, real_name = "Unknown", model_id, model_id
-            else:
-                category, l6_name, real_name = info
-            if category == "System":
-                continue
-            if bk.startswith('cab') and any(b['model_id'] == model_id for b in blocks):
-                continue
-            blocks.append({
-                'dsp': dsp_key, 'block_key': bk, 'model_id': model_id,
-                'category': category, 'l6_name': l6_name,
-                'real_name': real_name, 'enabled': enabled,
-            })
-    return blocks
+# One pass over the string; every replacement is final, so the braces in
+# \textbackslash{} and friends are never escaped a second time
+TEX_ESCAPES = {
+    '\\': '\\textbackslash{}',
+    '&': '\\&',
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '^': '\\^{}',
+}
+_TEX_SPECIAL_RE = re.compile('[' + re.escape(''.join(TEX_ESCAPES)) + ']')
 
 
+@lru_cache(maxsize=8192)
 def tex_escape(s):
     if not s:
         return ""
-    # Must escape backslash first
-    s = s.replace('\\', '\\textbackslash{}')
-    replacements = [
-        ('&', '\\&'),
-        ('%', '\\%'),
-        ('$', '\\$'),
-        ('#', '\\#'),
-        ('_', '\\_'),
-        ('{', '\\{'),
-        ('}', '\\}'),
-        ('~', '\\textasciitilde{}'),
-        ('^', '\\^{}'),
-    ]
-    for old, new in replacements:
-        s = s.replace(old, new)
-    # Fix over-escaped textbackslash
-    s = s.replace('\\textbackslash\\{\\}', '\\textbackslash{}')
-    return s
-
-def generate_latex(setlist_data, output_path):
-    """setlist_data: list of (setlist_name, presets_list, groups_list)"""
-    lines = []
+    # Most names have nothing to escape; skip building a new string for them
+    if not _TEX_SPECIAL_RE.search(s):
+        return s
+    return _TEX_SPECIAL_RE.sub(lambda m: TEX_ESCAPES[m.group()], s)
+
 
-    lines.append(r"""\documentclass[11pt,letterpaper]{article}
+LATEX_PREAMBLE = r"""\documentclass[11pt,letterpaper]{article}
 \usepackage[utf8]{inputenc}
 \usepackage[T1]{fontenc}
 \usepackage[margin=1in]{geometry}
@@ -917,111 +881,165 @@ Helix Native Owner's Manual and community sources.\par}
 
 \tableofcontents
 \newpage
-""")
+"""
 
-    # Collect index data across all setlists
-    amp_index = {}    # real_amp_name -> [(setlist, bank_str, preset_name)]
-    artist_index = {} # artist -> [(setlist, bank_str, preset_name)]
-    genre_index = {}  # genre -> [(setlist, bank_str, preset_name, label)]
-    pickup_index = {} # pickup_type -> {position -> [(setlist, bank_str, preset_name, label)]}
+# ═══════════════════════════════════════════════════════════════
+# FRAGMENT CACHE
+# Each preset's section and each index appendix is rendered to a text
+# fragment. With a cache dir, fragments are stored per output document,
+# keyed by a hash of everything they are rendered from, and reused on the
+# next run while that input is unchanged. Bump FRAGMENT_FORMAT whenever the
+# rendering code changes.
+# ═══════════════════════════════════════════════════════════════
 
-    for setlist_name, presets, groups in setlist_data:
-        lines.append(r'\section{' + tex_escape(setlist_name) + '}\n')
+FRAGMENT_FORMAT = 2
 
-        for group_title, start_idx, end_idx, group_desc in groups:
-            lines.append(r'\subsection{' + tex_escape(group_title) + '}\n')
-            lines.append(tex_escape(group_desc) + '\n\n')
-
-            for i in range(start_idx, min(end_idx, len(presets))):
-                preset = presets[i]
-                meta = preset.get('meta', {})
-                name = meta.get('name', f'Preset {i}')
-
-                if name == "New Preset":
-                    continue
-
-                info = PRESET_INFO.get(name.strip(), None)
-                decoded_name = info[0] if info else name
-                description = info[1] if info else "Factory preset."
-
-                blocks = extract_blocks(preset)
-                tempo = preset.get('tone', {}).get('global', {}).get('@tempo', None)
-
-                bank = i // 4
-                slot = chr(65 + (i % 4))
-                bank_str = f"{bank+1:02d}{slot}"
-
-                # Create a unique label for hyperlinking
-                preset_label = f"{setlist_name.replace(' ', '')}-{bank_str}"
-                lines.append(r'\subsubsection{' + bank_str + ': ' + tex_escape(name.strip()) + '}'
-                             + r'\hypertarget{' + preset_label + '}{}\n')
-
-                # ── Collect index data ──
-                entry = (setlist_name, bank_str, name.strip(), preset_label)
-                # Amp index: gather all amp/preamp blocks
-                for b in blocks:
-                    if b['category'] in ('Amp', 'Preamp') and b['real_name'] not in ('Unknown',):
-                        real = b['real_name']
-                        amp_index.setdefault(real, []).append(entry)
-                # Artist index
-                for artist in PRESET_ARTISTS.get(name.strip(), []):
-                    artist_index.setdefault(artist, []).append(entry)
-                # Genre index
-                for genre in PRESET_GENRES.get(name.strip(), []):
-                    genre_index.setdefault(genre, []).append(entry)
-                # Pickup index
-                pickup_info = PRESET_PICKUPS.get(name.strip(), None)
-                if pickup_info:
-                    ptype, ppos, pnotes = pickup_info
-                    pickup_index.setdefault(ptype, {}).setdefault(ppos, []).append(entry)
-                lines.append(r'\noindent\textbf{Decoded:} ' + tex_escape(decoded_name) + '\n')
-                lines.append(r'\medskip\noindent ' + tex_escape(description) + '\n')
-
-                # Pickup recommendation
-                pickup_info = PRESET_PICKUPS.get(name.strip(), None)
-                if pickup_info:
-                    ptype, ppos, pnotes = pickup_info
-                    pickup_line = r'\smallskip\noindent\textbf{Recommended Pickup:} '
-                    pickup_line += tex_escape(ptype) + ', ' + tex_escape(ppos)
-                    if pnotes:
-                        pickup_line += ' --- \\textit{' + tex_escape(pnotes) + '}'
-                    lines.append(pickup_line + '\n')
-
-                if tempo and tempo > 0:
-                    lines.append(r'\smallskip\noindent\textit{Tempo: ' + f'{tempo:.0f}' + r' BPM}' + '\n')
-
-                if blocks:
-                    lines.append(r'\smallskip')
-                    lines.append(r'\begin{small}')
-                    lines.append(r'\begin{longtable}{@{} l l l l @{}}')
-                    lines.append(r'\toprule')
-                    lines.append(r'\textbf{Category} & \textbf{Helix Name} & \textbf{Based On} & \textbf{Status} \\')
-                    lines.append(r'\midrule')
-                    lines.append(r'\endhead')
-
-                    for b in blocks:
-                        cat = tex_escape(b['category'])
-                        l6 = tex_escape(b['l6_name'])
-                        real = tex_escape(b['real_name'])
-                        if not b['enabled']:
-                            lines.append(r'\textcolor{disabledcolor}{' + cat + r'} & \textcolor{disabledcolor}{' + l6 + r'} & \textcolor{disabledcolor}{' + real + r'} & \textcolor{disabledcolor}{Off} \\')
-                        else:
-                            lines.append(cat + ' & ' + l6 + ' & ' + real + r' & On \\')
-
-                    lines.append(r'\bottomrule')
-                    lines.append(r'\end{longtable}')
-                    lines.append(r'\end{small}')
-
-                lines.append('')
 
-    # ═══════════════════════════════════════════════════════════
-    # APPENDIX: INDEX TABLES
-    # ═══════════════════════════════════════════════════════════
-    lines.append(r'\newpage')
-    lines.append(r'\appendix')
-    lines.append('')
+def _fragment_cache_path(cache_dir, output_path):
+    doc = hashlib.sha256(os.path.abspath(output_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'latex', f"{doc}.pickle")
+
+
+def _load_fragments(path):
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return {}
+    if not isinstance(entry, dict) or entry.get('format') != FRAGMENT_FORMAT:
+        return {}
+    return entry['fragments']
+
+
+def _fragment_key(*parts):
+    return hashlib.sha256(repr((FRAGMENT_FORMAT,) + parts).encode('utf-8')).hexdigest()
+
 
-    # ── Appendix A: Amp Make & Model Index ──
+def preset_fragment_key(setlist_name, index, preset, blocks):
+    """Return the cache key of a preset's section: a hash of all it is rendered from."""
+    name = factory_name(preset['name'], blocks)
+    chain = [(b['category'], b['l6_name'], b['real_name'], bool(b['enabled'])) for b in blocks]
+    return _fragment_key('preset', setlist_name, index, preset['name'], preset['tempo'], chain,
+                         PRESET_INFO.get(name), PRESET_PICKUPS.get(name))
+
+
+_SEARCH_INDEX = []
+
+
+@lru_cache(maxsize=None)
+def _factory_match(name, chain):
+    if not _SEARCH_INDEX:
+        try:
+            from helix_search import SearchIndex
+            _SEARCH_INDEX.append(SearchIndex.load())
+        except (OSError, ValueError):
+            _SEARCH_INDEX.append(None)
+    if _SEARCH_INDEX[0] is None:
+        return name
+    hit = _SEARCH_INDEX[0].match(name, chain)
+    return hit[1][0] if hit else name
+
+
+def factory_name(name, blocks=()):
+    """Return the key to look a preset up by in the PRESET_* tables.
+
+    That is the stripped name when a table has it, else the factory preset
+    the preset is a renamed or edited copy of, per helix_search's fuzzy
+    matcher (the name itself when no name is close or the chains disagree).
+    """
+    name = name.strip()
+    if (name in PRESET_INFO or name in PRESET_ARTISTS or name in PRESET_GENRES
+            or name in PRESET_PICKUPS):
+        return name
+    return _factory_match(name, tuple(sorted({b['l6_name'] for b in blocks})))
+
+
+def render_preset(setlist_name, index, preset, blocks):
+    """Return the LaTeX section for the preset in slot `index` of a setlist."""
+    lines = []
+    name = preset['name']
+    key = factory_name(name, blocks)
+
+    info = PRESET_INFO.get(key, None)
+    decoded_name = info[0] if info else name
+    description = info[1] if info else "Factory preset."
+
+    tempo = preset['tempo']
+
+    bank = index // 4
+    slot = chr(65 + (index % 4))
+    bank_str = f"{bank+1:02d}{slot}"
+
+    # Create a unique label for hyperlinking
+    preset_label = f"{setlist_name.replace(' ', '')}-{bank_str}"
+    lines.append(r'\subsubsection{' + bank_str + ': ' + tex_escape(name.strip()) + '}'
+                 + r'\hypertarget{' + preset_label + '}{}\n')
+    lines.append(r'\noindent\textbf{Decoded:} ' + tex_escape(decoded_name) + '\n')
+    lines.append(r'\medskip\noindent ' + tex_escape(description) + '\n')
+
+    # Pickup recommendation
+    pickup_info = PRESET_PICKUPS.get(key, None)
+    if pickup_info:
+        ptype, ppos, pnotes = pickup_info
+        pickup_line = r'\smallskip\noindent\textbf{Recommended Pickup:} '
+        pickup_line += tex_escape(ptype) + ', ' + tex_escape(ppos)
+        if pnotes:
+            pickup_line += ' --- \\textit{' + tex_escape(pnotes) + '}'
+        lines.append(pickup_line + '\n')
+
+    if tempo and tempo > 0:
+        lines.append(r'\smallskip\noindent\textit{Tempo: ' + f'{tempo:.0f}' + r' BPM}' + '\n')
+
+    if blocks:
+        lines.append(r'\smallskip')
+        lines.append(r'\begin{small}')
+        lines.append(r'\begin{longtable}{@{} l l l l @{}}')
+        lines.append(r'\toprule')
+        lines.append(r'\textbf{Category} & \textbf{Helix Name} & \textbf{Based On} & \textbf{Status} \\')
+        lines.append(r'\midrule')
+        lines.append(r'\endhead')
+
+        for b in blocks:
+            cat = tex_escape(b['category'])
+            l6 = tex_escape(b['l6_name'])
+            real = tex_escape(b['real_name'])
+            if not b['enabled']:
+                lines.append(r'\textcolor{disabledcolor}{' + cat + r'} & \textcolor{disabledcolor}{' + l6 + r'} & \textcolor{disabledcolor}{' + real + r'} & \textcolor{disabledcolor}{Off} \\')
+            else:
+                lines.append(cat + ' & ' + l6 + ' & ' + real + r' & On \\')
+
+        lines.append(r'\bottomrule')
+        lines.append(r'\end{longtable}')
+        lines.append(r'\end{small}')
+
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def collect_index_entries(indexes, setlist_name, index, preset, blocks):
+    """Add a preset to the (amp, artist, genre, pickup) index maps."""
+    amp_index, artist_index, genre_index, pickup_index = indexes
+    name = preset['name'].strip()
+    bank_str = f"{index // 4 + 1:02d}{chr(65 + index % 4)}"
+    entry = (setlist_name, bank_str, name, f"{setlist_name.replace(' ', '')}-{bank_str}")
+    # Amp index: gather all amp/preamp blocks
+    for b in blocks:
+        if b['category'] in ('Amp', 'Preamp') and b['real_name'] not in ('Unknown',):
+            amp_index.setdefault(b['real_name'], []).append(entry)
+    key = factory_name(name, blocks)
+    for artist in PRESET_ARTISTS.get(key, []):
+        artist_index.setdefault(artist, []).append(entry)
+    for genre in PRESET_GENRES.get(key, []):
+        genre_index.setdefault(genre, []).append(entry)
+    pickup_info = PRESET_PICKUPS.get(key, None)
+    if pickup_info:
+        ptype, ppos, pnotes = pickup_info
+        pickup_index.setdefault(ptype, {}).setdefault(ppos, []).append(entry)
+
+
+def render_amp_index(amp_index):
+    """Appendix A: presets grouped by the real-world amp they use."""
+    lines = []
     lines.append(r'\section{Index by Amp Make \& Model}')
     lines.append(r'This index lists all presets grouped by the real-world amplifier they use. '
                  r'Presets using multiple amps appear under each. '
@@ -1029,54 +1047,10 @@ Helix Native Owner's Manual and community sources.\par}
     lines.append('')
     lines.append(r'\medskip')
 
-    # Group amps by manufacturer
-    def amp_manufacturer(name):
-        """Extract manufacturer from amp name for grouping."""
-        mfrs = [
-            ("Fender", ["Fender"]),
-            ("Marshall", ["Marshall"]),
-            ("Vox", ["Vox"]),
-            ("MESA/Boogie", ["MESA"]),
-            ("Orange", ["Orange"]),
-            ("Bogner", ["Bogner"]),
-            ("Friedman", ["Friedman"]),
-            ("Diezel", ["Diezel"]),
-            ("Revv", ["Revv"]),
-            ("Peavey", ["Peavey"]),
-            ("PRS", ["PRS"]),
-            ("Roland", ["Roland"]),
-            ("Matchless", ["Matchless"]),
-            ("Trainwreck", ["Trainwreck"]),
-            ("Ampeg", ["Ampeg"]),
-            ("Aguilar", ["Aguilar"]),
-            ("Gallien-Krueger", ["Gallien"]),
-            ("Sunn", ["Sunn"]),
-            ("Acoustic", ["Acoustic 360", "Acoustic 3"]),
-            ("Silvertone", ["Silvertone"]),
-            ("Grammatico", ["Grammatico"]),
-            ("ENGL", ["ENGL"]),
-            ("Line 6", ["Line 6"]),
-            ("Ben Adrian", ["Ben Adrian"]),
-            ("Park", ["Park"]),
-            ("Supro", ["Supro"]),
-            ("Divided by 13", ["Divided"]),
-            ("Soldano", ["Soldano"]),
-            ("Hiwatt", ["Hiwatt"]),
-            ("Pearce", ["Pearce"]),
-            ("Pro Co", ["Pro Co"]),
-            ("Klon", ["Klon"]),
-            ("Electro-Harmonix", ["Electro-Harmonix", "EHX"]),
-        ]
-        for mfr, keys in mfrs:
-            for k in keys:
-                if k.lower() in name.lower():
-                    return mfr
-        return "Other"
-
     # Build manufacturer -> [(amp_name, entries)] structure
     mfr_amps = {}
     for amp_name in sorted(amp_index.keys()):
-        mfr = amp_manufacturer(amp_name)
+        mfr = manufacturer(amp_name) or "Other"
         mfr_amps.setdefault(mfr, []).append((amp_name, amp_index[amp_name]))
 
     for mfr in sorted(mfr_amps.keys()):
@@ -1101,7 +1075,12 @@ Helix Native Owner's Manual and community sources.\par}
         lines.append(r'\end{longtable}')
         lines.append(r'\end{small}')
         lines.append('')
+    return lines
+
 
+def render_artist_index(artist_index):
+    """Appendix B: presets by associated artist."""
+    lines = []
     # ── Appendix B: Artist Index ──
     lines.append(r'\newpage')
     lines.append(r'\section{Index by Artist}')
@@ -1130,7 +1109,12 @@ Helix Native Owner's Manual and community sources.\par}
     lines.append(r'\bottomrule')
     lines.append(r'\end{longtable}')
     lines.append(r'\end{small}')
+    return lines
+
 
+def render_genre_index(genre_index):
+    """Appendix C: presets by genre."""
+    lines = []
     # ── Appendix C: Genre Index ──
     lines.append(r'\newpage')
     lines.append(r'\section{Index by Genre}')
@@ -1157,7 +1141,12 @@ Helix Native Owner's Manual and community sources.\par}
         lines.append(r'\end{longtable}')
         lines.append(r'\end{small}')
         lines.append('')
+    return lines
+
 
+def render_pickup_index(pickup_index):
+    """Appendix D: presets by recommended pickup type and position."""
+    lines = []
     # ── Appendix D: Pickup Recommendation Index ──
     lines.append(r'\newpage')
     lines.append(r'\section{Index by Recommended Pickup Configuration}')
@@ -1204,87 +1193,264 @@ Helix Native Owner's Manual and community sources.\par}
         lines.append(r'\end{longtable}')
         lines.append(r'\end{small}')
         lines.append('')
+    return lines
+
+
+# ═══════════════════════════════════════════════════════════════
+# GROUP RENDERING
+# Each setlist group renders independently (in a worker process with
+# --jobs) and returns its text plus partial index maps, which
+# generate_latex() merges in document order so the output does not depend
+# on which worker finished first.
+# ═══════════════════════════════════════════════════════════════
+
+# Fragment keys already cached by the parent, handed to each worker once
+_worker_cached_keys = frozenset()
+
+
+def _init_render_worker(cached_keys):
+    global _worker_cached_keys
+    _worker_cached_keys = cached_keys
+
+
+def render_group(job, cached_keys=None):
+    """Render one setlist group.
+
+    `job` is (setlist_name, (title, start, end, description), [(slot, preset,
+    blocks), ...]). Returns (header_lines, fragment_keys, rendered, indexes):
+    the preset sections in order as fragment keys, the text of every key not
+    in `cached_keys`, and the group's partial (amp, artist, genre, pickup)
+    index maps.
+    """
+    if cached_keys is None:
+        cached_keys = _worker_cached_keys
+    setlist_name, (group_title, _, _, group_desc), slots = job
+    header = [r'\subsection{' + tex_escape(group_title) + '}\n',
+              tex_escape(group_desc) + '\n\n']
+    keys = []
+    rendered = {}
+    indexes = ({}, {}, {}, {})
+    for i, preset, blocks in slots:
+        if preset['name'] == "New Preset":
+            continue
+        collect_index_entries(indexes, setlist_name, i, preset, blocks)
+        key = preset_fragment_key(setlist_name, i, preset, blocks)
+        if key not in cached_keys:
+            rendered[key] = render_preset(setlist_name, i, preset, blocks)
+        keys.append(key)
+    return header, keys, rendered, indexes
+
+
+def _slim_slot(slot):
+    """Keep only the fields rendering reads, so jobs are cheap to send to a worker."""
+    i, preset, blocks = slot
+    return (i, {'name': preset['name'], 'tempo': preset['tempo']},
+            [{'category': b['category'], 'l6_name': b['l6_name'],
+              'real_name': b['real_name'], 'enabled': b['enabled']} for b in blocks])
+
+
+def merge_index_entries(indexes, partial):
+    """Append a group's partial index maps to the document-wide ones."""
+    amp_index, artist_index, genre_index, pickup_index = indexes
+    for index, part in zip((amp_index, artist_index, genre_index), partial):
+        for key, entries in part.items():
+            index.setdefault(key, []).extend(entries)
+    for ptype, positions in partial[3].items():
+        for pos, entries in positions.items():
+            pickup_index.setdefault(ptype, {}).setdefault(pos, []).extend(entries)
+
+
+def generate_latex(setlist_data, output_path, cache_dir=None, jobs=1):
+    """setlist_data: list of (setlist_name, presets_list, groups_list)
+
+    presets_list holds one (parse_preset info, blocks in signal-flow order)
+    pair per setlist slot, as returned by helix_parser.load_parsed_setlist().
+
+    With a cache_dir, rendered preset sections and index appendices are
+    cached there and only the presets and indices whose inputs changed since
+    the last run are rendered again. The output file is left untouched when
+    its content would not change. With jobs > 1, setlist groups are
+    rendered in that many worker processes.
+    """
+    cache_path = _fragment_cache_path(cache_dir, output_path) if cache_dir else None
+    cached = _load_fragments(cache_path) if cache_path else {}
+    fragments = {}
+
+    def fragment(key, render):
+        text = cached.get(key)
+        if text is None:
+            text = render()
+        fragments[key] = text
+        return text
+
+    lines = [LATEX_PREAMBLE]
+
+    # Collect index data across all setlists
+    amp_index = {}    # real_amp_name -> [(setlist, bank_str, preset_name, label)]
+    artist_index = {} # artist -> [(setlist, bank_str, preset_name, label)]
+    genre_index = {}  # genre -> [(setlist, bank_str, preset_name, label)]
+    pickup_index = {} # pickup_type -> {position -> [(setlist, bank_str, preset_name, label)]}
+    indexes = (amp_index, artist_index, genre_index, pickup_index)
+
+    work = []
+    for setlist_name, presets, groups in setlist_data:
+        for group in groups:
+            _, start_idx, end_idx, _ = group
+            slots = [(i,) + tuple(presets[i]) for i in range(start_idx, min(end_idx, len(presets)))]
+            work.append((setlist_name, group, slots))
+
+    if jobs > 1 and len(work) > 1:
+        work = [(name, group, [_slim_slot(s) for s in slots]) for name, group, slots in work]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                                 initargs=(frozenset(cached),)) as pool:
+            results = iter(list(pool.map(render_group, work)))
+    else:
+        results = (render_group(job, cached) for job in work)
+
+    for setlist_name, presets, groups in setlist_data:
+        lines.append(r'\section{' + tex_escape(setlist_name) + '}\n')
+        for _ in groups:
+            header, keys, rendered, partial = next(results)
+            lines.extend(header)
+            for key in keys:
+                text = rendered[key] if key in rendered else cached[key]
+                fragments[key] = text
+                lines.append(text)
+            merge_index_entries(indexes, partial)
+
+    # ═══════════════════════════════════════════════════════════
+    # APPENDIX: INDEX TABLES
+    # ═══════════════════════════════════════════════════════════
+    lines.append(r'\newpage')
+    lines.append(r'\appendix')
+    lines.append('')
+
+    for render, index in [(render_amp_index, amp_index), (render_artist_index, artist_index),
+                          (render_genre_index, genre_index), (render_pickup_index, pickup_index)]:
+        # The amp appendix groups by manufacturer, so MANUFACTURERS is part of the key
+        lines.append(fragment(_fragment_key(render.__name__, index, MANUFACTURERS),
+                              lambda: '\n'.join(render(index))))
 
     lines.append(r'\end{document}')
 
-    with open(output_path, 'w') as f:
-        f.write('\n'.join(lines))
+    if cache_path and fragments != cached:
+        write_cache_entry(cache_path, {'format': FRAGMENT_FORMAT, 'fragments': fragments})
+
+    text = '\n'.join(lines)
+    try:
+        with open(output_path, 'r') as f:
+            unchanged = f.read() == text
+    except (OSError, UnicodeDecodeError):
+        unchanged = False
+    if not unchanged:
+        with open(output_path, 'w') as f:
+            f.write(text)
     return output_path
 
 
+# ═══════════════════════════════════════════════════════════════
+# SETLIST GROUPS: (title, first slot, end slot, description)
+# ═══════════════════════════════════════════════════════════════
+
+FACTORY1_GROUPS = [
+    ("Amp Showcase Presets (01A--08D)", 0, 32,
+     "These presets showcase individual amp models with minimal effects, providing a direct reference for each amplifier's tonal character."),
+    ("Bass Presets (09A--11B)", 32, 43,
+     "Bass-focused presets demonstrating the bass amplifier models, from classic tube to modern solid-state."),
+    ("Artist & Song-Inspired Presets (11C--17A)", 43, 66,
+     "Presets inspired by specific artists, songs, or tonal aesthetics. Names are often obfuscated for trademark reasons."),
+    ("Artist Signature Presets (17B--27C)", 66, 108,
+     "Presets created by or in collaboration with professional artists who use the Helix platform."),
+    ("Genre & Creative Presets (27D--30C)", 108, 120,
+     "Genre-specific, creative sound design, and utility presets."),
+    ("Sound Effects Presets (30D--32C)", 120, 128,
+     "Experimental sound-design presets for cinematic and ambient textures."),
+]
+
+FACTORY2_GROUPS = [
+    ("Song-Inspired & Creative Presets (01A--08D)", 0, 32,
+     "An eclectic collection of presets inspired by songs, genres, and creative tonal concepts, ranging from boutique cleans to heavy distortion."),
+    ("Song-Inspired & Genre Presets (09A--20D)", 32, 80,
+     "A broad collection referencing classic rock songs, artists, and genre archetypes from blues and country to prog-rock and shoegaze."),
+    ("Bass Presets (21A--23C)", 80, 91,
+     "Bass-focused presets covering parallel fuzz, funk, British bass, synth bass, and more."),
+]
+
+TEMPLATES_GROUPS = [
+    ("Quick Start & Signal Routing Templates (01A--01D)", 0, 4,
+     "Basic starter presets and signal routing templates demonstrating parallel paths, snapshot-based amp switching, and serial routing configurations."),
+    ("External Amp & Multi-Cable Routing (02A--03D)", 4, 16,
+     "Routing templates for integrating Helix with external amplifiers and effects loops, including 4-cable, 7-cable, wet/dry/wet, and A/B tone switching configurations. These are primarily relevant to Helix hardware rather than Helix Native."),
+    ("Multi-Instrument & Mixing Templates (04A--04D)", 16, 20,
+     "Templates for processing multiple instruments simultaneously, including guitar-and-vocals dual paths, four-input mixing, and DT-series amp control."),
+    ("MIDI & Synth Utilities (05A--05D)", 20, 24,
+     "Utility templates using Helix as a MIDI controller, synth bass pedalboard, or momentary pitch-shift effects processor."),
+    ("DAW Remote Control Templates (06A--10B)", 24, 42,
+     "MIDI remote control presets that turn Helix into a DAW transport controller or media playback remote. Each template is preconfigured for a specific application's keyboard shortcuts or MIDI mapping."),
+    ("Bonus Presets (32D)", 127, 128,
+     "Miscellaneous bonus presets placed at the end of the Templates bank."),
+]
+
+
+def setlist_groups(hls_path, preset_count):
+    """Pick the section grouping for a setlist from its filename."""
+    upper = str(hls_path).upper()
+    if 'FACTORY_1' in upper or 'FACTORY1' in upper:
+        return FACTORY1_GROUPS
+    elif 'FACTORY_2' in upper or 'FACTORY2' in upper:
+        return FACTORY2_GROUPS
+    elif 'TEMPLATE' in upper:
+        return TEMPLATES_GROUPS
+    return [("All Presets", 0, preset_count, "All presets in this setlist.")]
+
+
+def load_setlist_data(hls_files, cache_dir=None):
+    """Parse .hls files into the setlist_data list generate_latex() takes."""
+    setlist_data = []
+    for hls_path in hls_files:
+        print(f"Parsing: {hls_path}")
+        _, infos, blocks = load_parsed_setlist(hls_path, cache_dir)
+        presets = list(zip(infos, blocks))
+        name = os.path.splitext(os.path.basename(hls_path))[0].replace('_', ' ')
+        print(f"  {len(presets)} presets in {name}")
+        setlist_data.append((name, presets, setlist_groups(hls_path, len(presets))))
+    return setlist_data
+
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python3 generate_latex.py <setlist1.hls> [setlist2.hls ...] [-o output.tex]")
+        print("Usage: python3 generate_latex.py <setlist1.hls> [setlist2.hls ...] [-o output.tex]"
+              " [--cache-dir DIR] [--no-cache] [--jobs N]")
         sys.exit(1)
 
     hls_files = []
     output_path = 'helix_reference.tex'
+    cache_dir = DEFAULT_CACHE_DIR
+    jobs = 1
     i = 1
     while i < len(sys.argv):
         if sys.argv[i] == '-o' and i+1 < len(sys.argv):
             output_path = sys.argv[i+1]
             i += 2
+        elif sys.argv[i] == '--cache-dir' and i+1 < len(sys.argv):
+            cache_dir = sys.argv[i+1]
+            i += 2
+        elif sys.argv[i] == '--no-cache':
+            cache_dir = None
+            i += 1
+        elif sys.argv[i] == '--jobs' and i+1 < len(sys.argv):
+            try:
+                jobs = int(sys.argv[i+1]) or os.cpu_count() or 1
+            except ValueError:
+                print(f"Error: --jobs expects a number, got {sys.argv[i+1]}")
+                sys.exit(1)
+            i += 2
         else:
             hls_files.append(sys.argv[i])
             i += 1
 
-    FACTORY1_GROUPS = [
-        ("Amp Showcase Presets (01A--08D)", 0, 32,
-         "These presets showcase individual amp models with minimal effects, providing a direct reference for each amplifier's tonal character."),
-        ("Bass Presets (09A--11B)", 32, 43,
-         "Bass-focused presets demonstrating the bass amplifier models, from classic tube to modern solid-state."),
-        ("Artist & Song-Inspired Presets (11C--17A)", 43, 66,
-         "Presets inspired by specific artists, songs, or tonal aesthetics. Names are often obfuscated for trademark reasons."),
-        ("Artist Signature Presets (17B--27C)", 66, 108,
-         "Presets created by or in collaboration with professional artists who use the Helix platform."),
-        ("Genre & Creative Presets (27D--30C)", 108, 120,
-         "Genre-specific, creative sound design, and utility presets."),
-        ("Sound Effects Presets (30D--32C)", 120, 128,
-         "Experimental sound-design presets for cinematic and ambient textures."),
-    ]
-
-    FACTORY2_GROUPS = [
-        ("Song-Inspired & Creative Presets (01A--08D)", 0, 32,
-         "An eclectic collection of presets inspired by songs, genres, and creative tonal concepts, ranging from boutique cleans to heavy distortion."),
-        ("Song-Inspired & Genre Presets (09A--20D)", 32, 80,
-         "A broad collection referencing classic rock songs, artists, and genre archetypes from blues and country to prog-rock and shoegaze."),
-        ("Bass Presets (21A--23C)", 80, 91,
-         "Bass-focused presets covering parallel fuzz, funk, British bass, synth bass, and more."),
-    ]
-
-    TEMPLATES_GROUPS = [
-        ("Quick Start & Signal Routing Templates (01A--01D)", 0, 4,
-         "Basic starter presets and signal routing templates demonstrating parallel paths, snapshot-based amp switching, and serial routing configurations."),
-        ("External Amp & Multi-Cable Routing (02A--03D)", 4, 16,
-         "Routing templates for integrating Helix with external amplifiers and effects loops, including 4-cable, 7-cable, wet/dry/wet, and A/B tone switching configurations. These are primarily relevant to Helix hardware rather than Helix Native."),
-        ("Multi-Instrument & Mixing Templates (04A--04D)", 16, 20,
-         "Templates for processing multiple instruments simultaneously, including guitar-and-vocals dual paths, four-input mixing, and DT-series amp control."),
-        ("MIDI & Synth Utilities (05A--05D)", 20, 24,
-         "Utility templates using Helix as a MIDI controller, synth bass pedalboard, or momentary pitch-shift effects processor."),
-        ("DAW Remote Control Templates (06A--10B)", 24, 42,
-         "MIDI remote control presets that turn Helix into a DAW transport controller or media playback remote. Each template is preconfigured for a specific application's keyboard shortcuts or MIDI mapping."),
-        ("Bonus Presets (32D)", 127, 128,
-         "Miscellaneous bonus presets placed at the end of the Templates bank."),
-    ]
-
-    setlist_data = []
-    for hls_path in hls_files:
-        print(f"Parsing: {hls_path}")
-        presets = parse_hls(hls_path)
-        name = os.path.splitext(os.path.basename(hls_path))[0].replace('_', ' ')
-        print(f"  {len(presets)} presets in {name}")
-
-        if 'FACTORY_1' in hls_path.upper() or 'FACTORY1' in hls_path.upper():
-            groups = FACTORY1_GROUPS
-        elif 'FACTORY_2' in hls_path.upper() or 'FACTORY2' in hls_path.upper():
-            groups = FACTORY2_GROUPS
-        elif 'TEMPLATE' in hls_path.upper():
-            groups = TEMPLATES_GROUPS
-        else:
-            groups = [("All Presets", 0, len(presets), "All presets in this setlist.")]
-
-        setlist_data.append((name, presets, groups))
+    setlist_data = load_setlist_data(hls_files, cache_dir)
 
     print(f"Generating: {output_path}")
-    generate_latex(setlist_data, output_path)
+    generate_latex(setlist_data, output_path, cache_dir, jobs)
     print("Done!")
@@ -8,6 +8,10 @@ Usage:
     python3 helix_parser.py /path/to/single_preset.hlx
     python3 helix_parser.py /path/to/hlx/folder --xlsx output.xlsx
     python3 helix_parser.py /path/to/hlx/folder --csv output.csv
+    python3 helix_parser.py /path/to/hlx/folder --columns blocks/
+    python3 helix_parser.py /path/to/setlist.hls --no-cache
+    python3 helix_parser.py /path/to/hls/folder --index presets.sqlite
+    python3 helix_parser.py query --index presets.sqlite "model=HD2_AmpBritPlexi -> category=Delay"
 """
 
 import json
@@ -15,8 +19,26 @@ import os
 import sys
 import csv
 import re
+import shlex
+import sqlite3
+import base64
+import binascii
+import codecs
+import hashlib
+import heapq
+import pickle
+import struct
+import tempfile
+import time
+import zlib
+from array import array
+from bisect import bisect_right
 from pathlib import Path
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from copy import copy
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
 
 # ─── Helix Model ID → Human-Readable Name Lookup ───
 # Categories: Amp, Cab, Dist, Delay, Mod, Reverb, Comp, EQ, Filter, Pitch,
@@ -403,43 +425,1231 @@ MODEL_DB = {
     "HD2_AppDSPFlowSplitAB": ("Routing", "Split A/B", "A/B Split"),
     "HD2_AppDSPFlowSplitDynamic": ("Routing", "Split Dynamic", "Dynamic Split"),
     "HD2_AppDSPFlowSplitCrossover": ("Routing", "Split Crossover", "Crossover Split"),
+    "HD2_AppDSPFlowSplitXOver": ("Routing", "Split Crossover", "Crossover Split"),
     "HD2_AppDSPFlowJoin": ("Routing", "Join", "Path Join"),
 }
 
 
+# ─── Model Lookup ───
+# Ids missing from MODEL_DB (newer firmware, user libraries) are named from
+# the id itself: "HD2_DistKlonCentaur" → ('Drive', 'Dist Klon Centaur', ...).
+# The category comes from the longest known prefix in CATEGORY_PREFIXES that
+# ends on a CamelCase word boundary, found by walking a prefix trie built
+# once at import; other ids split at their first word boundary. Results are
+# memoized, and every preset block with an unknown id is tallied in
+# UNKNOWN_MODELS.
+
+CATEGORY_PREFIXES = MappingProxyType({
+    'Amp': 'Amp', 'Preamp': 'Preamp', 'Cab': 'Cab', 'Dist': 'Drive',
+    'Delay': 'Delay', 'Reverb': 'Reverb', 'Compressor': 'Comp',
+    'EQ': 'EQ', 'Filter': 'Filter', 'Wah': 'Wah', 'Pitch': 'Pitch',
+    'Synth': 'Synth', 'FM4': 'Synth', 'Tremolo': 'Mod', 'Chorus': 'Mod',
+    'Flanger': 'Mod', 'Phaser': 'Mod', 'Rotary': 'Mod', 'VolPan': 'Utility',
+    'Looper': 'Looper', 'FXLoop': 'FX Loop', 'App': 'Routing'
+})
+UNKNOWN_MODELS = Counter()
+FALLBACK_CACHE_SIZE = 4096
+
+_CAMEL_RE = re.compile(r'([A-Z])')
+_TRIE_END = ''
+
+
+def _build_prefix_trie(prefixes):
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[_TRIE_END] = prefix
+    return trie
+
+
+_PREFIX_TRIE = _build_prefix_trie(CATEGORY_PREFIXES)
+
+
+def _is_word_start(s, i):
+    """True if a CamelCase word (uppercase then lowercase) starts at s[i]."""
+    return i + 1 < len(s) and s[i].isupper() and s[i + 1].islower()
+
+
+def _split_model_id(rest):
+    """Split the part of an id after 'HD2_' into (prefix, remainder), or None."""
+    node = _PREFIX_TRIE
+    best = None
+    for i, ch in enumerate(rest):
+        node = node.get(ch)
+        if node is None:
+            break
+        if _TRIE_END in node and _is_word_start(rest, i + 1):
+            best = i + 1
+    if best is None:
+        best = next((i for i in range(1, len(rest)) if _is_word_start(rest, i)), None)
+        if best is None:
+            return None
+    return rest[:best], rest[best:]
+
+
+@lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def _fallback_model(model_id):
+    parts = _split_model_id(model_id[4:]) if model_id.startswith('HD2_') else None
+    if parts is None:
+        return ("Unknown", model_id, "")
+    prefix, rest = parts
+    name = _CAMEL_RE.sub(r' \1', rest).strip()
+    return (CATEGORY_PREFIXES.get(prefix, prefix), f"{prefix} {name}", f"(Unknown: {model_id})")
+
+
 def lookup_model(model_id):
     """Look up a model ID and return (category, name, based_on) or a parsed fallback."""
-    if model_id in MODEL_DB:
-        return MODEL_DB[model_id]
-    # Try to parse the ID into something readable
-    # e.g. HD2_AmpBritPlexi → "Amp: Brit Plexi"
-    m = re.match(r'HD2_(\w+?)([A-Z][a-z].*)', model_id)
-    if m:
-        prefix = m.group(1)
-        name = re.sub(r'([A-Z])', r' \1', m.group(2)).strip()
-        cat_map = {
-            'Amp': 'Amp', 'Preamp': 'Preamp', 'Cab': 'Cab', 'Dist': 'Drive',
-            'Delay': 'Delay', 'Reverb': 'Reverb', 'Compressor': 'Comp',
-            'EQ': 'EQ', 'Filter': 'Filter', 'Wah': 'Wah', 'Pitch': 'Pitch',
-            'Synth': 'Synth', 'FM4': 'Synth', 'Tremolo': 'Mod', 'Chorus': 'Mod',
-            'Flanger': 'Mod', 'Phaser': 'Mod', 'Rotary': 'Mod', 'VolPan': 'Utility',
-            'Looper': 'Looper', 'FXLoop': 'FX Loop', 'App': 'Routing'
-        }
-        cat = cat_map.get(prefix, prefix)
-        return (cat, f"{prefix} {name}", f"(Unknown: {model_id})")
-    return ("Unknown", model_id, "")
+    info = MODEL_DB.get(model_id)
+    return info if info is not None else _fallback_model(model_id)
+
+
+def count_unknown_models(blocks):
+    """Tally the blocks with ids missing from MODEL_DB in UNKNOWN_MODELS.
+
+    Called once per preset as its blocks are decoded, or loaded from the
+    cache, a worker process or a library.
+    """
+    for b in blocks:
+        if b.model >= KNOWN_MODELS:
+            UNKNOWN_MODELS[b.model_id] += 1
+
+
+def unknown_models():
+    """Return [(model_id, block count)] for ids missing from MODEL_DB, most frequent first."""
+    return UNKNOWN_MODELS.most_common()
+
+
+def print_unknown_models():
+    """Print the model ids that were not in MODEL_DB, to help extend it."""
+    unknown = unknown_models()
+    if not unknown:
+        return
+    print(f"\n{len(unknown)} model ID(s) not in MODEL_DB:")
+    for model_id, count in unknown:
+        cat, name, _ = lookup_model(model_id)
+        print(f"  {count:5d}  {model_id:40s} → {cat}: {name}")
+
+
+# ─── Manufacturers ───
+# (manufacturer, keywords): a model is made by the first manufacturer with a
+# keyword in its real-world name, ignoring case. Each model's manufacturer
+# is resolved once when it is interned and stored in MODEL_TABLE.
+
+MANUFACTURERS = [
+    ("Fender", ["Fender"]),
+    ("Marshall", ["Marshall"]),
+    ("Vox", ["Vox"]),
+    ("MESA/Boogie", ["MESA"]),
+    ("Orange", ["Orange"]),
+    ("Bogner", ["Bogner"]),
+    ("Friedman", ["Friedman"]),
+    ("Diezel", ["Diezel"]),
+    ("Revv", ["Revv"]),
+    ("Peavey", ["Peavey"]),
+    ("PRS", ["PRS"]),
+    ("Roland", ["Roland"]),
+    ("Matchless", ["Matchless"]),
+    ("Trainwreck", ["Trainwreck"]),
+    ("Ampeg", ["Ampeg"]),
+    ("Aguilar", ["Aguilar"]),
+    ("Gallien-Krueger", ["Gallien"]),
+    ("Sunn", ["Sunn"]),
+    ("Acoustic", ["Acoustic 360", "Acoustic 3"]),
+    ("Silvertone", ["Silvertone"]),
+    ("Grammatico", ["Grammatico"]),
+    ("ENGL", ["ENGL"]),
+    ("Line 6", ["Line 6"]),
+    ("Ben Adrian", ["Ben Adrian"]),
+    ("Park", ["Park"]),
+    ("Supro", ["Supro"]),
+    ("Divided by 13", ["Divided"]),
+    ("Soldano", ["Soldano"]),
+    ("Hiwatt", ["Hiwatt"]),
+    ("Pearce", ["Pearce"]),
+    ("Pro Co", ["Pro Co"]),
+    ("Klon", ["Klon"]),
+    ("Electro-Harmonix", ["Electro-Harmonix", "EHX"]),
+]
+_MANUFACTURER_KEYS = [(key.lower(), mfr) for mfr, keys in MANUFACTURERS for key in keys]
+_MANUFACTURER_MEMO = {}
+
+
+def manufacturer(based_on):
+    """Return the manufacturer of a real-world model name, or None if not recognized."""
+    try:
+        return _MANUFACTURER_MEMO[based_on]
+    except KeyError:
+        pass
+    lowered = based_on.lower()
+    mfr = next((m for key, m in _MANUFACTURER_KEYS if key in lowered), None)
+    _MANUFACTURER_MEMO[based_on] = mfr
+    return mfr
+
+
+# ─── Compact Preset Representation ───
+# Whole libraries are held in memory for analysis, so blocks and presets use
+# __slots__ classes instead of per-instance dicts. Model ids and categories
+# are interned to small integer codes: MODEL_DB entries get fixed codes at
+# import, ids missing from MODEL_DB get the next free code when first seen.
+# Both classes still answer dict-style access (b['name'], info.get(...)).
+
+CATEGORIES = []        # category code -> category name
+_CATEGORY_CODES = {}
+MODEL_TABLE = []       # model code -> (model_id, category code, name, based_on, manufacturer)
+_MODEL_CODES = {}
+
+
+def category_code(category):
+    """Return the interned integer code for a category name."""
+    code = _CATEGORY_CODES.get(category)
+    if code is None:
+        code = _CATEGORY_CODES[category] = len(CATEGORIES)
+        CATEGORIES.append(category)
+    return code
+
+
+def model_code(model_id):
+    """Return the interned integer code for a model id, resolving it on first use."""
+    code = _MODEL_CODES.get(model_id)
+    if code is None:
+        cat, name, based_on = lookup_model(model_id)
+        code = _MODEL_CODES[model_id] = len(MODEL_TABLE)
+        MODEL_TABLE.append((sys.intern(model_id), category_code(cat), name, based_on,
+                            manufacturer(based_on)))
+    return code
+
+
+for _model_id in sorted(MODEL_DB):
+    model_code(_model_id)
+del _model_id
+KNOWN_MODELS = len(MODEL_TABLE)   # codes at or past this are ids missing from MODEL_DB
+
+
+class Block(Mapping):
+    """One processing block on a DSP, with read-only dict-style access."""
+
+    __slots__ = ('dsp', 'block', 'position', 'path', 'model', 'enabled', 'stereo', 'type',
+                 'params')
+
+    FIELDS = ('block', 'position', 'path', 'enabled', 'model_id', 'category',
+              'name', 'based_on', 'type', 'stereo', 'dsp', 'manufacturer')
+    # extract_blocks() historically used these key names
+    ALIASES = {'block_key': 'block', 'l6_name': 'name', 'real_name': 'based_on'}
+
+    def __init__(self, dsp, block, model_id, position=99, path=0,
+                 enabled=True, stereo=False, type='', params=None):
+        self.dsp = dsp
+        self.block = sys.intern(block)
+        self.model = model_code(model_id)
+        self.position = position
+        self.path = path
+        self.enabled = enabled
+        self.stereo = stereo
+        self.type = type
+        # {parameter name: float}, only filled in when parsing with params=True
+        self.params = params
+
+    @property
+    def model_id(self):
+        return MODEL_TABLE[self.model][0]
+
+    @property
+    def category(self):
+        return CATEGORIES[MODEL_TABLE[self.model][1]]
+
+    @property
+    def category_code(self):
+        return MODEL_TABLE[self.model][1]
+
+    @property
+    def name(self):
+        return MODEL_TABLE[self.model][2]
+
+    @property
+    def based_on(self):
+        return MODEL_TABLE[self.model][3]
+
+    @property
+    def manufacturer(self):
+        return MODEL_TABLE[self.model][4]
+
+    def __getitem__(self, key):
+        key = self.ALIASES.get(key, key)
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __reduce__(self):
+        # Pickle the model id, not the process-local code
+        return (Block, (self.dsp, self.block, self.model_id, self.position,
+                        self.path, self.enabled, self.stereo, self.type, self.params))
+
+    def __repr__(self):
+        return f"Block({self.dsp}.{self.block}: {self.model_id})"
+
+
+SNAPSHOT_COUNT = 8
+# @controller value of parameters assigned to the snapshot controller
+SNAPSHOT_CONTROLLER = 19
+
+
+class SnapshotStates:
+    """The block states and parameter values of a preset's snapshots, as bitsets.
+
+    Block slot j is the preset's j-th block (DSP 0 first, in Preset order).
+    Bit j of enabled[s] is set when that block is on in snapshot s, and bit s
+    of by_block[j] is the same fact read the other way; bit s of `valid`
+    marks the snapshots in use. Parameters assigned to the snapshot
+    controller are listed in `controlled` as (block slot, parameter), and
+    their value in snapshot s is values[s * len(controlled) + k] (NaN when
+    the snapshot stores none).
+    """
+
+    __slots__ = ('valid', 'enabled', 'by_block', 'controlled', 'values')
+
+    def __init__(self, valid=0, enabled=(0,) * SNAPSHOT_COUNT, controlled=(), values=()):
+        self.valid = valid
+        self.enabled = tuple(enabled)
+        self.controlled = tuple(controlled)
+        self.values = array('d', values)
+        width = max(e.bit_length() for e in self.enabled)
+        self.by_block = tuple(sum(1 << s for s, e in enumerate(self.enabled) if e >> j & 1)
+                              for j in range(width))
+
+    @classmethod
+    def from_tone(cls, tone, blocks):
+        """Compile the snapshotN enable maps and controller values of a raw tone dict."""
+        slots = {(b.dsp, b.block): j for j, b in enumerate(blocks)}
+        base = sum(1 << j for j, b in enumerate(blocks) if b.enabled)
+
+        controlled = []
+        for dsp_name in ['dsp0', 'dsp1']:
+            dsp = tone.get('controller', {}).get(dsp_name, {})
+            for key in sorted(dsp):
+                j = slots.get((dsp_name, key))
+                if j is None or not isinstance(dsp[key], dict):
+                    continue
+                for param in sorted(dsp[key]):
+                    ctl = dsp[key][param]
+                    if isinstance(ctl, dict) and ctl.get('@controller') == SNAPSHOT_CONTROLLER:
+                        controlled.append((j, sys.intern(param)))
+        index = {c: k for k, c in enumerate(controlled)}
+
+        valid = 0
+        enabled = []
+        values = array('d', [float('nan')]) * (SNAPSHOT_COUNT * len(controlled))
+        for s in range(SNAPSHOT_COUNT):
+            snap = tone.get(f'snapshot{s}', {})
+            if snap.get('@valid', False):
+                valid |= 1 << s
+            bits = base
+            for dsp_name, states in (snap.get('blocks') or {}).items():
+                for key, on in states.items():
+                    j = slots.get((dsp_name, key))
+                    if j is not None:
+                        bits = bits | (1 << j) if on else bits & ~(1 << j)
+            enabled.append(bits)
+            for dsp_name, params_by_block in (snap.get('controllers') or {}).items():
+                for key, params in params_by_block.items():
+                    j = slots.get((dsp_name, key))
+                    for param, ctl in params.items():
+                        k = index.get((j, param))
+                        if k is not None and isinstance(ctl.get('@value'), (int, float)):
+                            values[s * len(controlled) + k] = float(ctl['@value'])
+        return cls(valid, enabled, controlled, values)
+
+    def active(self, snapshot):
+        """Return the bitset of block slots that are on in a snapshot."""
+        return self.enabled[snapshot]
+
+    def snapshots_enabling(self, block_mask):
+        """Return the bitset of valid snapshots in which any block of block_mask is on."""
+        found = 0
+        while block_mask:
+            j = (block_mask & -block_mask).bit_length() - 1
+            if j < len(self.by_block):
+                found |= self.by_block[j]
+            block_mask &= block_mask - 1
+        return found & self.valid
+
+    def overrides(self, snapshot):
+        """Return [(block slot, parameter, value)] stored by a snapshot."""
+        n = len(self.controlled)
+        values = self.values[snapshot * n:(snapshot + 1) * n]
+        return [(j, param, v) for (j, param), v in zip(self.controlled, values) if v == v]
+
+    def __eq__(self, other):
+        return (isinstance(other, SnapshotStates) and self.valid == other.valid
+                and self.enabled == other.enabled and self.controlled == other.controlled
+                and self.values.tobytes() == other.values.tobytes())
+
+    def __reduce__(self):
+        return (SnapshotStates, (self.valid, self.enabled, self.controlled, self.values))
+
+    def __repr__(self):
+        return f"SnapshotStates(valid={self.valid:#010b}, {len(self.controlled)} controlled)"
+
+
+def _bits(mask):
+    """Return the indices of the set bits of mask, lowest first."""
+    out = []
+    while mask:
+        out.append((mask & -mask).bit_length() - 1)
+        mask &= mask - 1
+    return out
+
+
+# ─── Routing Graph ───
+# Blocks only record a path (A/B) and a position, so each DSP's routing is
+# rebuilt from its topology (@topology0/1: 'A', 'AB', 'SAB', 'ABJ' or 'SABJ'),
+# the split and join positions, the input/output assignments and the links
+# from amp and cab blocks to the cabN slots they use. routing_spec() pulls
+# those facts out of the raw tone dict; the spec is what gets cached, and
+# RoutingGraph builds the DAG from it and the blocks.
+
+# @output codes of a DSP's outputs; 0 means unused
+ROUTING_OUTPUTS = {1: 'Main Out', 2: 'DSP 1 Path A', 3: 'DSP 1 Path B'}
+# Spec of a DSP with no routing information: one path, input to main out
+_PLAIN_ROUTING = ('', 0, 8, 1, 0, 1, 0, ())
+
+
+def routing_spec(tone):
+    """Return the routing of both DSPs of a raw tone dict.
+
+    Each DSP gets (split model, split position, join position, input A,
+    input B, output A, output B, ((block key, cabN key), ...)).
+    """
+    spec = []
+    for dsp_name in ['dsp0', 'dsp1']:
+        dsp = tone.get(dsp_name, {})
+        if not isinstance(dsp, dict):
+            spec.append(_PLAIN_ROUTING)
+            continue
+        split = dsp.get('split') or {}
+        cabs = tuple(sorted((sys.intern(key), sys.intern(val['@cab'])) for key, val in dsp.items()
+                            if isinstance(val, dict) and isinstance(val.get('@cab'), str)
+                            and val['@cab']))
+        spec.append((sys.intern(split.get('@model', '')), split.get('@position', 0),
+                     (dsp.get('join') or {}).get('@position', 8),
+                     (dsp.get('inputA') or {}).get('@input', 0),
+                     (dsp.get('inputB') or {}).get('@input', 0),
+                     (dsp.get('outputA') or {}).get('@output', 0),
+                     (dsp.get('outputB') or {}).get('@output', 0),
+                     cabs))
+    return tuple(spec)
+
+
+class RoutingGraph:
+    """The signal flow of a preset across both DSPs, as a DAG.
+
+    Nodes are (kind, dsp, label, slot) tuples, kind being 'input', 'block',
+    'split', 'join' or 'output' and slot the block's index in Preset.blocks
+    (None for routing nodes). edges[n] lists the successors of node n.
+    `order` is a topological order of the nodes, computed once, and
+    `blocks` the Blocks in that order: cabs follow the amp that uses them,
+    and path A comes before path B.
+    """
+
+    __slots__ = ('nodes', 'edges', 'order', 'blocks', '_all_blocks', '_sections')
+
+    def __init__(self, dsp0, dsp1, topologies=('A', 'A'), spec=None):
+        self._all_blocks = all_blocks = tuple(dsp0) + tuple(dsp1)
+        self.nodes = []
+        self.edges = []
+        self._sections = []
+        inputs, outputs = [], []
+        offset = 0
+        for d, (dsp_blocks, topology) in enumerate(zip((dsp0, dsp1), topologies)):
+            dspec = spec[d] if spec else _PLAIN_ROUTING
+            slots = range(offset, offset + len(dsp_blocks))
+            offset += len(dsp_blocks)
+            ins, outs = self._add_dsp(d, slots, topology or 'A', dspec)
+            inputs.append(ins)
+            outputs.append(outs)
+
+        # DSP 0 outputs routed to DSP 1 feed its inputs
+        for node, code in outputs[0]:
+            if code in (2, 3):
+                self.edges[node].append(inputs[1][min(code - 2, len(inputs[1]) - 1)])
+
+        # Kahn's algorithm, lowest node id first, so the order follows the
+        # order nodes were added in: DSP 0 before DSP 1, path A before B
+        indegree = [0] * len(self.nodes)
+        for succ in self.edges:
+            for n in succ:
+                indegree[n] += 1
+        ready = [n for n, deg in enumerate(indegree) if not deg]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            n = heapq.heappop(ready)
+            order.append(n)
+            for m in self.edges[n]:
+                indegree[m] -= 1
+                if not indegree[m]:
+                    heapq.heappush(ready, m)
+        self.order = tuple(order)
+        self.blocks = tuple(all_blocks[self.nodes[n][3]] for n in order
+                            if self.nodes[n][0] == 'block')
+
+    def _node(self, kind, dsp, label, slot=None, after=()):
+        n = len(self.nodes)
+        self.nodes.append((kind, dsp, label, slot))
+        self.edges.append([])
+        for prev in after:
+            self.edges[prev].append(n)
+        return n
+
+    def _chain(self, dsp, slots, prev):
+        """Add block nodes in sequence after node `prev`; return the last node."""
+        for j in slots:
+            prev = self._node('block', dsp, self._all_blocks[j].name, j, (prev,))
+        return prev
+
+    def _add_dsp(self, d, slots, topology, dspec):
+        """Add one DSP's nodes; return (input nodes, [(output node, @output code)])."""
+        split_model, split_pos, join_pos, in_a, in_b, out_a, out_b, cabs = dspec
+        blocks = self._all_blocks
+        by_key = {blocks[j].block: j for j in slots}
+        # Cab slots are placed right after the block that uses them
+        cab_of = {by_key[key]: by_key[cab] for key, cab in cabs if key in by_key and cab in by_key}
+        attached = set(cab_of.values())
+
+        def expand(owners):
+            out = []
+            for j in owners:
+                while j is not None and j not in out:
+                    out.append(j)
+                    j = cab_of.get(j)
+            return out
+
+        path_a = [j for j in slots if blocks[j].path != 1 and j not in attached]
+        # Cab slots no block claims sort to the end of path A, as before
+        path_b = [j for j in slots if blocks[j].path == 1 and j not in attached]
+        has_b = 'B' in topology or bool(path_b)
+        split = has_b and 'S' in topology
+        join = has_b and 'J' in topology
+        pre = [j for j in path_a if split and blocks[j].position < split_pos]
+        post = [j for j in path_a if join and blocks[j].position >= join_pos and j not in pre]
+        mid_a = [j for j in path_a if j not in pre and j not in post]
+        pre, mid_a, path_b, post = expand(pre), expand(mid_a), expand(path_b), expand(post)
+        split_label = lookup_model(split_model)[1] if split else ''
+        self._sections.append((pre, mid_a, path_b, post, split_label, join,
+                               (out_a, out_b) if d == 0 else (0, 0)))
+
+        ins = [self._node('input', d, 'Input' if in_a == 1 else 'Input A')]
+        if has_b and not split:
+            ins.append(self._node('input', d, 'Input' if in_b == 1 else 'Input B'))
+        last = self._chain(d, pre, ins[0])
+        if split:
+            last = self._node('split', d, split_label, None, (last,))
+        end_a = self._chain(d, mid_a, last)
+        if not has_b:
+            return ins, [(self._output(d, out_a, 'Output', end_a), out_a)]
+        if join:
+            end_b = self._chain(d, path_b, last if split else ins[1])
+            end = self._chain(d, post, self._node('join', d, 'Join', None, (end_a, end_b)))
+            return ins, [(self._output(d, out_a, 'Output', end), out_a)]
+        # Without a join each path ends at its own output
+        outputs = [(self._output(d, out_a, 'Output A', end_a), out_a)]
+        end_b = self._chain(d, path_b, last if split else ins[1])
+        outputs.append((self._output(d, out_b, 'Output B', end_b), out_b))
+        return ins, outputs
+
+    def _output(self, dsp, code, default, prev):
+        return self._node('output', dsp, ROUTING_OUTPUTS.get(code, default), None, (prev,))
+
+    def chain(self, dsp, enabled=None):
+        """Return one DSP's signal chain as a single line.
+
+        Parallel paths are shown as '(A: ... | B: ...)' between the split and
+        the join. `enabled`, a bitset over block slots (such as a snapshot's),
+        overrides the blocks' own on/off state.
+        """
+        pre, mid_a, path_b, post, split_label, join, dests = self._sections[dsp]
+        blocks = self._all_blocks
+
+        def names(slots):
+            parts = []
+            for j in slots:
+                on = blocks[j].enabled if enabled is None else enabled >> j & 1
+                parts.append(blocks[j].name if on else f"[OFF] {blocks[j].name}")
+            return ' → '.join(parts)
+
+        def routed(text, code):
+            # Only routing to the other DSP is worth spelling out
+            return f"{text} → {ROUTING_OUTPUTS[code]}" if code in (2, 3) else text
+
+        if not (pre or mid_a or path_b or post):
+            return "(empty)"
+        if not path_b and not split_label and not join:
+            return routed(names(mid_a), dests[0])
+        parts = [names(pre)] if pre else []
+        if split_label:
+            parts.append(split_label)
+        a, b = names(mid_a) or "(empty)", names(path_b) or "(empty)"
+        if join:
+            parts += [f"(A: {a} | B: {b})", 'Join']
+            if post:
+                parts.append(names(post))
+            return routed(' → '.join(parts), dests[0])
+        parts.append(f"(A: {routed(a, dests[0])} | B: {routed(b, dests[1])})")
+        return ' → '.join(parts)
+
+
+# Tone keys besides snapshot0..7 that a lazy Preset keeps to decode from
+_DECODED_TONE_KEYS = frozenset(('dsp0', 'dsp1', 'controller'))
+
+
+class Preset(Mapping):
+    """A parsed preset as returned by parse_preset(), with dict-style access.
+
+    Name, tempo, topology and snapshots are read up front. A preset built
+    from a raw tone dict keeps the parts of it the blocks are decoded from
+    (the DSPs, snapshots and controller map) and only decodes the DSP block
+    lists (model lookups, filtering and sorting) the first time they are
+    accessed, or when decode() is called. The snapshot states, per-category
+    names and signal chain strings are likewise built once on first use.
+    """
+
+    __slots__ = ('name', 'file', 'setlist', 'setlist_index', 'tempo',
+                 'topology0', 'topology1', 'snapshots', '_dsp0', '_dsp1', '_states',
+                 '_snapshot_src', '_routing_spec', '_routing', '_tone', '_params',
+                 '_categories', '_chains')
+
+    FIELDS = ('name', 'file', 'setlist', 'setlist_index', 'tempo',
+              'topology0', 'topology1', 'snapshots', 'dsp0', 'dsp1', 'snapshot_states',
+              'routing_spec')
+
+    def __init__(self, name, file, setlist='', setlist_index='', tempo='',
+                 topology0='', topology1='', snapshots=(), dsp0=(), dsp1=(),
+                 snapshot_states=None, routing_spec=None, tone=None, params=False):
+        self.name = name
+        self.file = file
+        self.setlist = setlist
+        self.setlist_index = setlist_index
+        self.tempo = tempo
+        self.topology0 = topology0
+        self.topology1 = topology1
+        self.snapshots = snapshots
+        self._tone = tone
+        self._params = params
+        self._categories = None
+        self._chains = None
+        self._routing = None
+        if tone is None:
+            self._set_blocks(dsp0, dsp1, snapshot_states, routing_spec)
+        else:
+            self._tone = {k: v for k, v in tone.items() if k in _DECODED_TONE_KEYS
+                          or k.startswith('snapshot')}
+
+    def _set_blocks(self, dsp0, dsp1, snapshot_states=None, routing_spec=None):
+        self._dsp0 = dsp0
+        self._dsp1 = dsp1
+        self._states = snapshot_states
+        self._snapshot_src = None
+        self._routing_spec = routing_spec
+        self._routing = None
+        self._tone = None
+        self._categories = None
+        self._chains = None
+
+    def _decode(self):
+        dsps = []
+        for dsp_name in ['dsp0', 'dsp1']:
+            blocks = list(iter_signal_blocks(self._tone.get(dsp_name, {}), dsp_name, self._params))
+            blocks.sort(key=lambda b: (b.path, b.position))
+            dsps.append(tuple(blocks))
+        # Only the snapshot and controller maps are kept for snapshot_states
+        src = {k: v for k, v in self._tone.items() if k.startswith('snapshot') or k == 'controller'}
+        self._set_blocks(dsps[0], dsps[1], None, routing_spec(self._tone))
+        self._snapshot_src = src
+        count_unknown_models(dsps[0] + dsps[1])
+
+    @property
+    def decoded(self):
+        """Whether the block lists have been built yet."""
+        return self._tone is None
+
+    def decode(self):
+        """Build the block lists now and drop the tone dict; returns the preset."""
+        if self._tone is not None:
+            self._decode()
+        return self
+
+    @property
+    def dsp0(self):
+        if self._tone is not None:
+            self._decode()
+        return self._dsp0
+
+    @dsp0.setter
+    def dsp0(self, blocks):
+        # Block slots shift, so the snapshot states no longer apply; the
+        # routing spec refers to blocks by key and still does
+        self._set_blocks(blocks, self.dsp1, None, self.routing_spec)
+
+    @property
+    def dsp1(self):
+        if self._tone is not None:
+            self._decode()
+        return self._dsp1
+
+    @dsp1.setter
+    def dsp1(self, blocks):
+        self._set_blocks(self.dsp0, blocks, None, self.routing_spec)
+
+    @property
+    def snapshot_states(self):
+        """The SnapshotStates over self.blocks, or None if not parsed from a tone."""
+        if self._tone is not None:
+            self._decode()
+        if self._snapshot_src is not None:
+            self._states = SnapshotStates.from_tone(self._snapshot_src, self.blocks)
+            self._snapshot_src = None
+        return self._states
+
+    @snapshot_states.setter
+    def snapshot_states(self, states):
+        self._set_blocks(self.dsp0, self.dsp1, states, self.routing_spec)
+
+    @property
+    def routing_spec(self):
+        """The routing_spec() of the tone this preset was parsed from, or None."""
+        if self._tone is not None:
+            self._decode()
+        return self._routing_spec
+
+    @routing_spec.setter
+    def routing_spec(self, spec):
+        self._set_blocks(self.dsp0, self.dsp1, self.snapshot_states, spec)
+
+    @property
+    def routing(self):
+        """The preset's RoutingGraph, built on first use."""
+        if self._routing is None:
+            self._routing = RoutingGraph(self.dsp0, self.dsp1, (self.topology0, self.topology1),
+                                         self.routing_spec)
+        return self._routing
+
+    @property
+    def blocks(self):
+        """All blocks, DSP 0 first."""
+        return self.dsp0 + self.dsp1
+
+    def slot_mask(self, category):
+        """Return the bitset of block slots holding blocks of a category."""
+        return sum(1 << j for j, b in enumerate(self.blocks) if b.category == category)
+
+    def snapshot_changes(self, snapshot):
+        """Return (blocks switched on, blocks switched off) by a snapshot, vs. the saved preset."""
+        states = self.snapshot_states
+        if states is None:
+            return [], []
+        bits = states.active(snapshot)
+        on, off = [], []
+        for j, b in enumerate(self.blocks):
+            if bits >> j & 1 != bool(b.enabled):
+                (on if bits >> j & 1 else off).append(b)
+        return on, off
+
+    def iter_snapshots(self):
+        """Yield (snapshot number, name) for each valid snapshot."""
+        states = self.snapshot_states
+        if states is None:
+            return iter(())
+        return zip(_bits(states.valid), self.snapshots)
+
+    def snapshot_blocks(self, snapshot):
+        """Return (dsp0, dsp1) with each block's `enabled` as set in a snapshot.
+
+        Blocks whose state differs from the preset's are copies; the rest
+        are the preset's own.
+        """
+        states = self.snapshot_states
+        if states is None:
+            return self.dsp0, self.dsp1
+        bits = states.active(snapshot)
+        dsps = ([], [])
+        for j, b in enumerate(self.blocks):
+            on = bool(bits >> j & 1)
+            if on != bool(b.enabled):
+                b = copy(b)
+                b.enabled = on
+            dsps[b.dsp == 'dsp1'].append(b)
+        return tuple(dsps[0]), tuple(dsps[1])
+
+    @property
+    def categories(self):
+        """{category: [block names]} over all blocks, in block order."""
+        if self._categories is None:
+            cats = {}
+            for b in self.blocks:
+                cats.setdefault(b.category, []).append(b.name)
+            self._categories = cats
+        return self._categories
+
+    @property
+    def chains(self):
+        """The RoutingGraph.chain() strings of DSP 0 and DSP 1."""
+        if self._chains is None:
+            self._chains = (self.routing.chain(0), self.routing.chain(1))
+        return self._chains
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __reduce__(self):
+        # Always pickled decoded, so cache entries never hold raw tone dicts
+        return (Preset, tuple(getattr(self, f) for f in self.FIELDS))
+
+    def __repr__(self):
+        return f"Preset({self.name!r}, {self.file!r})"
+
+
+# ─── Streaming .hls Decoder ───
+# A .hls file is a small JSON envelope whose "encoded_data" string holds a
+# base64-encoded, zlib-compressed JSON setlist ({"meta": ..., "presets": [...]}).
+# The functions below walk that chain in fixed-size chunks so only one preset
+# is ever held in memory at a time.
+
+HLS_CHUNK_SIZE = 64 * 1024
+
+_ENCODED_DATA_RE = re.compile(r'"encoded_data"\s*:\s*"')
+# Everything up to the next bracket that is not inside a JSON string.
+# Written unrolled so a failed match (string cut off at the end of the
+# buffer) cannot backtrack exponentially.
+_JSON_BRACKET_RE = re.compile(
+    r'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])', re.S)
+_JSON_KEY_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*$')
+_JSON_SEPARATOR_RE = re.compile(r'[\s,]*')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _iter_hls_sections(filepath, chunk_size=HLS_CHUNK_SIZE):
+    """Split a .hls file into ('text', s) envelope pieces and ('data', s) base64 pieces.
+
+    Joining the 'text' pieces gives the envelope JSON with an empty
+    "encoded_data" string; the 'data' pieces are the base64 payload.
+    """
+    keep = 64  # tail kept back so the key can't straddle two reads
+    inside = False
+    pending = ''
+    with open(filepath, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            pending += chunk
+            while pending:
+                if inside:
+                    end = pending.find('"')
+                    # A quote after an odd run of backslashes is escaped
+                    while end > 0 and (end - len(pending[:end].rstrip('\\'))) % 2:
+                        end = pending.find('"', end + 1)
+                    if end < 0:
+                        # Hold back trailing backslashes so an escape isn't split
+                        cut = len(pending.rstrip('\\'))
+                        if cut:
+                            yield 'data', pending[:cut]
+                        pending = pending[cut:]
+                        break
+                    if end:
+                        yield 'data', pending[:end]
+                    pending = pending[end:]
+                    inside = False
+                else:
+                    m = _ENCODED_DATA_RE.search(pending)
+                    if m:
+                        yield 'text', pending[:m.end()]
+                        pending = pending[m.end():]
+                        inside = True
+                        continue
+                    if chunk and len(pending) > keep:
+                        yield 'text', pending[:-keep]
+                        pending = pending[-keep:]
+                    break
+            if not chunk:
+                break
+    if inside:
+        raise ValueError(f"{filepath}: unterminated encoded_data string")
+    if pending:
+        yield 'text', pending
+
+
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r',
+                 't': '\t'}
+_JSON_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|[^u])', re.S)
+# Whitespace is legal between base64 groups and is dropped before decoding
+_BASE64_WHITESPACE = {ord(c): None for c in ' \t\r\n'}
+
+
+def _unescape_json(text):
+    """Decode the JSON string escapes in text; return (decoded, incomplete escape at the end)."""
+    if '\\' not in text:
+        return text, ''
+    # Fast path for the usual case, where '\/' is the only escape
+    if '\\\\' not in text:
+        plain = text.replace('\\/', '/')
+        if '\\' not in plain:
+            return plain, ''
+    out = []
+    pos = 0
+    for m in _JSON_ESCAPE_RE.finditer(text):
+        if '\\' in text[pos:m.start()]:
+            break
+        esc = m.group(1)
+        if esc[0] == 'u':
+            out.append(text[pos:m.start()] + chr(int(esc[1:], 16)))
+        elif esc in _JSON_ESCAPES:
+            out.append(text[pos:m.start()] + _JSON_ESCAPES[esc])
+        else:
+            raise ValueError(f"invalid JSON escape \\{esc}")
+        pos = m.end()
+    rest = text[pos:]
+    cut = rest.find('\\')
+    if cut < 0:
+        return ''.join(out) + rest, ''
+    # Only a \uXXXX cut short by the end of the text may be left over
+    if len(rest) - cut > 5 or not re.fullmatch(r'\\(u[0-9a-fA-F]{0,3})?', rest[cut:]):
+        raise ValueError(f"invalid JSON escape {rest[cut:cut + 6]!r}")
+    return ''.join(out) + rest[:cut], rest[cut:]
+
+
+def _iter_hls_base64(filepath, chunk_size=HLS_CHUNK_SIZE, text=None):
+    """Yield the base64 payload of a .hls file, unescaped and without whitespace.
+
+    The envelope's 'text' pieces are appended to the `text` list if given.
+    """
+    carry = ''
+    for kind, piece in _iter_hls_sections(filepath, chunk_size):
+        if kind == 'text':
+            if text is not None:
+                text.append(piece)
+            continue
+        data, carry = _unescape_json(carry + piece)
+        if data:
+            yield data.translate(_BASE64_WHITESPACE)
+    if carry:
+        raise ValueError(f"{filepath}: invalid JSON escape at the end of encoded_data")
+
+
+def _parse_envelope(text):
+    header = json.loads(''.join(text))
+    header.pop('encoded_data', None)
+    return header
+
+
+def _envelope_name(text, filepath):
+    """Return the setlist name from the envelope text read so far.
+
+    That is the whole envelope once the payload has been read, or the text
+    up to the payload while it is streamed. Helix Native writes meta before
+    encoded_data; when it isn't there the envelope is read again in full.
+    """
+    joined = ''.join(text)
+    meta = None
+    for candidate in (joined, joined + '"}'):
+        try:
+            meta = json.loads(candidate).get('meta')
+            break
+        except ValueError:
+            pass
+    if not isinstance(meta, dict) or 'name' not in meta:
+        meta = read_hls_header(filepath).get('meta', {})
+    return meta.get('name', Path(filepath).stem)
+
+
+def _scan_hls_envelope(filepath, digest=None):
+    """Read the .hls envelope, optionally feeding the base64 payload to a hashlib digest."""
+    text = []
+    for data in _iter_hls_base64(filepath, text=text):
+        if digest is not None:
+            digest.update(data.encode('ascii'))
+    return _parse_envelope(text)
+
+
+def read_hls_header(filepath):
+    """Return the .hls envelope (meta, compression, ...) without decoding the payload."""
+    return _scan_hls_envelope(filepath)
+
+
+def _iter_hls_payload(filepath, chunk_size=HLS_CHUNK_SIZE, text=None):
+    """Yield the decompressed setlist JSON of a .hls file as text chunks.
+
+    The envelope's 'text' pieces are appended to the `text` list if given.
+    """
+    inflater = zlib.decompressobj()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    carry = ''
+    for data in _iter_hls_base64(filepath, chunk_size, text):
+        carry += data
+        usable = len(carry) - len(carry) % 4
+        if not usable:
+            continue
+        try:
+            raw = base64.b64decode(carry[:usable], validate=True)
+        except (ValueError, binascii.Error) as e:
+            raise ValueError(f"{filepath}: invalid base64 payload: {e}") from None
+        carry = carry[usable:]
+        while raw:
+            out = inflater.decompress(raw, chunk_size)
+            raw = inflater.unconsumed_tail
+            if out:
+                yield utf8.decode(out)
+    if carry:
+        raise ValueError(f"{filepath}: truncated base64 payload")
+    tail = inflater.flush()
+    yield utf8.decode(tail, final=True)
+
+
+def _iter_json_array_items(chunks, key='presets'):
+    """Incrementally yield the objects of a JSON array from a stream of text chunks.
+
+    The array is either the top-level value or the value of `key` in the
+    top-level object. The bracket structure is scanned only until the array
+    opens; from there each item is parsed by json's raw_decode(), which is
+    retried with more text when an item runs past the end of the buffer.
+    """
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    depth = 0
+    for chunk in chunks:
+        buf += chunk
+        found = False
+        while True:
+            m = _JSON_BRACKET_RE.match(buf, pos)
+            if not m:
+                break
+            ch = m.group(1)
+            pos = m.end()
+            if ch in '{[':
+                if ch == '[' and (depth == 0 or depth == 1 and _is_key(m.group(0), key)):
+                    found = True
+                    break
+                depth += 1
+            else:
+                depth -= 1
+        if found:
+            break
+    else:
+        return
+
+    more = True
+    longest = 0     # items tend to be alike, so read ahead by the longest one yet
+    while True:
+        pos = _JSON_SEPARATOR_RE.match(buf, pos).end()
+        if pos < len(buf) and (not more or len(buf) - pos > longest + longest // 2):
+            if buf[pos] == ']':
+                return
+            try:
+                item, end = _JSON_DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not more:
+                    raise
+            else:
+                yield item
+                longest = max(longest, end - pos)
+                pos = end
+                continue
+        elif pos < len(buf) and buf[pos] == ']':
+            return
+        elif not more:
+            raise ValueError("unterminated JSON array")
+        # Need more text: drop what has been consumed, then read at least as
+        # much again as is pending so a long item isn't re-parsed per chunk
+        buf = buf[pos:]
+        pos = 0
+        wanted = max(len(buf), longest, 1)
+        added = 0
+        while added < wanted:
+            chunk = next(chunks, None)
+            if chunk is None:
+                more = False
+                break
+            buf += chunk
+            added += len(chunk)
+
+
+def _is_key(text, key):
+    k = _JSON_KEY_RE.search(text, 0, len(text) - 1)
+    return bool(k) and k.group(1) == key
+
+
+def iter_hls_presets(filepath, chunk_size=HLS_CHUNK_SIZE):
+    """Stream the raw preset dicts ({'meta', 'tone', ...}) of a .hls file one at a time."""
+    return _iter_json_array_items(_iter_hls_payload(filepath, chunk_size))
+
+
+def iter_hls_setlist(filepath):
+    """Stream (preset_data, setlist_name, index) tuples from a .hls setlist file."""
+    # The setlist name is taken from the envelope text read before the
+    # payload, so the file is only read once
+    text = []
+    presets = _iter_json_array_items(_iter_hls_payload(filepath, text=text))
+    setlist_name = None
+    for i, p in enumerate(presets):
+        if setlist_name is None:
+            setlist_name = _envelope_name(text, filepath)
+        wrapped = {'data': {'meta': p.get('meta', {}), 'tone': p.get('tone', {})}}
+        yield wrapped, setlist_name, i
+
+
+# ─── Name Scan ───
+# Listing a setlist only needs each preset's meta.name (and global.@tempo),
+# so scan_hls_names() regex-searches the decompressed text for those two
+# flat objects instead of building the whole preset. It relies on the key
+# order Helix Native writes: the setlist's own meta before "presets", and
+# each preset's meta before its tone. Every preset has one "tone" object,
+# so a preset whose meta is missing or nested is still counted by it.
+
+NAME_SCAN_KEEP = 16 * 1024   # longest meta/global object a match can straddle
+_FLAT_JSON_OBJECT = r'\{(?:[^{}"]|"(?:[^"\\]|\\.)*")*\}'
+# An object's text up to its first nested object; unlike a bare '{' it can't
+# match a flat object cut off at the end of the buffer
+_NESTED_JSON_OBJECT = r'\{(?:[^{}"]|"(?:[^"\\]|\\.)*")*(?=\{)'
+_NAME_SCAN_RE = re.compile(r'"(presets|meta|tone)"\s*:\s*(\[|'
+                           + _FLAT_JSON_OBJECT + '|' + _NESTED_JSON_OBJECT + ')')
+_NAME_TEMPO_SCAN_RE = re.compile(r'"(presets|meta|tone|global)"\s*:\s*(\[|'
+                                 + _FLAT_JSON_OBJECT + '|' + _NESTED_JSON_OBJECT + ')')
+
+
+def scan_hls_names(filepath, tempo=False):
+    """Yield (name, tempo) for each preset of a .hls setlist without parsing its blocks.
+
+    tempo is only read when asked for, and is '' otherwise or when missing.
+    A preset without a flat meta object gets the 'Preset N' name
+    parse_preset() gives it, so positions match iter_hls_presets().
+    A setlist still memoized by load_setlist() is read from memory instead.
+    """
+    hit = _SETLIST_MEMO.get(_file_signature(filepath))
+    if hit is not None:
+        for i, p in enumerate(hit[1]):
+            bpm = p.get('tone', {}).get('global', {}).get('@tempo', '') if tempo else ''
+            yield p.get('meta', {}).get('name', f'Preset {i}'), bpm
+        return
+
+    pattern = _NAME_TEMPO_SCAN_RE if tempo else _NAME_SCAN_RE
+    in_presets = False
+    current = None     # [name, tempo, meta seen, tone seen] of the preset being read
+    count = 0
+    buf = ''
+    waiting = False    # a nested meta runs past the end of buf
+    for chunk in _iter_hls_payload(filepath):
+        buf += chunk
+        pos = 0
+        waiting = False
+        for m in pattern.finditer(buf):
+            key, value = m.groups()
+            if key == 'meta' and in_presets and not value.endswith('}'):
+                # Nested meta: decode it whole, once all of it has been read
+                try:
+                    meta, end = _JSON_DECODER.raw_decode(buf, m.start(2))
+                except ValueError:
+                    waiting = True
+                    break
+            else:
+                meta, end = None, m.end()
+            pos = end
+            if key == 'presets':
+                in_presets = True
+                continue
+            if not in_presets or value == '[':
+                continue
+            if key == 'global':
+                if current is not None and current[3] and current[1] == '' and value.endswith('}'):
+                    current[1] = json.loads(value).get('@tempo', '')
+                continue
+            # The meta comes first, so a meta after either key, or a second
+            # tone, means the next preset has begun
+            if current is None or current[3] or (key == 'meta' and current[2]):
+                if current is not None:
+                    yield current[0], current[1]
+                current = [f'Preset {count}', '', False, False]
+                count += 1
+            if key == 'meta':
+                current[2] = True
+                current[0] = (meta or json.loads(value)).get('name', current[0])
+            else:
+                current[3] = True
+        buf = buf[pos:] if waiting else buf[max(pos, len(buf) - NAME_SCAN_KEEP):]
+    if waiting:
+        raise ValueError(f"{filepath}: malformed preset meta")
+    if current is not None:
+        yield current[0], current[1]
+
+
+# ─── Setlist Loading ───
+# Single entry point for every tool that reads .hls files. The most recently
+# decoded setlists are memoized per process on (path, mtime, size), so
+# generate_latex.py and helix_parser.py never decode the same file twice in a
+# row, without keeping every setlist of a long run alive.
+
+SETLIST_MEMO_SIZE = 2
+_SETLIST_MEMO = OrderedDict()
+
+
+def clear_setlist_memo():
+    """Forget every memoized setlist, so the next load decodes from disk."""
+    _SETLIST_MEMO.clear()
+
+
+def _file_signature(filepath):
+    st = os.stat(filepath)
+    return (os.path.realpath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def load_setlist(filepath):
+    """Return (setlist_name, presets) for a .hls file, decoding it at most once per process.
+
+    `presets` is the list of raw preset dicts ({'meta', 'tone', ...}); it is
+    shared between callers and must be treated as read-only.
+    """
+    sig = _file_signature(filepath)
+    hit = _SETLIST_MEMO.get(sig)
+    if hit is not None:
+        _SETLIST_MEMO.move_to_end(sig)
+        return hit
+    text = []
+    presets = list(_iter_json_array_items(_iter_hls_payload(filepath, text=text)))
+    hit = (_envelope_name(text, filepath), presets)
+    # Drop entries for older versions of the same file
+    for old in [k for k in _SETLIST_MEMO if k[0] == sig[0]]:
+        del _SETLIST_MEMO[old]
+    _SETLIST_MEMO[sig] = hit
+    while len(_SETLIST_MEMO) > SETLIST_MEMO_SIZE:
+        _SETLIST_MEMO.popitem(last=False)
+    return hit
+
+
+def parse_hls(filepath):
+    """Return the list of raw preset dicts in a .hls setlist."""
+    return list(load_setlist(filepath)[1])
 
 
 def parse_hls_setlist(filepath):
     """Parse a .hls setlist file and return list of (preset_data, setlist_name, index) tuples."""
-    import base64, zlib
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    setlist_name = data.get('meta', {}).get('name', Path(filepath).stem)
-    raw = base64.b64decode(data['encoded_data'])
-    decompressed = zlib.decompress(raw)
-    setlist = json.loads(decompressed.decode('utf-8'))
-    presets_raw = setlist.get('presets', [])
+    setlist_name, presets_raw = load_setlist(filepath)
     results = []
     for i, p in enumerate(presets_raw):
         wrapped = {'data': {'meta': p.get('meta', {}), 'tone': p.get('tone', {})}}
@@ -447,8 +1657,72 @@ def parse_hls_setlist(filepath):
     return results
 
 
-def parse_preset(filepath, override_data=None, setlist_name=None, setlist_index=None):
-    """Parse a single .hlx file (or pre-loaded data) and return structured data."""
+# ─── Block Extraction ───
+
+# Categories that describe signal routing rather than audio blocks
+SKIP_CATEGORIES = ('Routing', 'System')
+
+
+def block_params(block):
+    """Return {name: float} for the numeric parameters of a raw block dict.
+
+    '@'-prefixed keys are block metadata, not parameters. Switch parameters
+    stored as booleans count as 0.0/1.0.
+    """
+    return {sys.intern(k): float(v) for k, v in block.items()
+            if not k.startswith('@') and isinstance(v, (int, float))}
+
+
+def iter_signal_blocks(dsp, dsp_name='dsp0', params=False):
+    """Yield a Block for each audio block of one DSP, in slot-key order.
+
+    These are the block rules shared by every consumer: routing nodes
+    (HD2_AppDSP*, Routing/System categories) are skipped, and a cabN slot
+    repeating a model already seen on the same DSP is dropped. With
+    params=True each Block also carries its numeric parameters.
+    """
+    if not isinstance(dsp, dict):
+        return
+    seen = set()
+    for key in sorted(dsp):
+        val = dsp[key]
+        if not isinstance(val, dict) or '@model' not in val:
+            continue
+        model_id = val['@model']
+        if model_id.startswith('HD2_AppDSP'):
+            continue
+        code = model_code(model_id)
+        if CATEGORIES[MODEL_TABLE[code][1]] in SKIP_CATEGORIES:
+            continue
+        if key.startswith('cab') and code in seen:
+            continue
+        seen.add(code)
+        yield Block(dsp_name, key, model_id,
+                    position=val.get('@position', 99),
+                    path=val.get('@path', 0),
+                    enabled=val.get('@enabled', True),
+                    stereo=val.get('@stereo', False),
+                    type=val.get('@type', ''),
+                    params=block_params(val) if params else None)
+
+
+def extract_blocks(preset):
+    """Return the blocks of a raw preset dict in DSP/slot order, as used by the reference document."""
+    tone = preset.get('tone', {})
+    blocks = []
+    for dsp_key in ['dsp0', 'dsp1']:
+        blocks.extend(iter_signal_blocks(tone.get(dsp_key, {}), dsp_key))
+    return blocks
+
+
+def parse_preset(filepath, override_data=None, setlist_name=None, setlist_index=None,
+                 params=False):
+    """Parse a single .hlx file (or pre-loaded data) and return a Preset.
+
+    Only the preset's metadata is read here; its blocks are decoded from the
+    tone dict when first accessed. With params=True every Block keeps its
+    numeric parameters in `params`.
+    """
     if override_data:
         data = override_data
     else:
@@ -459,58 +1733,142 @@ def parse_preset(filepath, override_data=None, setlist_name=None, setlist_index=
     tone = data.get('data', {}).get('tone', {})
     glob = tone.get('global', {})
 
-    source = Path(filepath).name if not setlist_name else f"{setlist_name} #{setlist_index:03d}"
-    preset_info = {
-        'name': meta.get('name', Path(filepath).stem if not setlist_name else f'Preset {setlist_index}'),
-        'file': source,
-        'setlist': setlist_name or '',
-        'setlist_index': setlist_index if setlist_index is not None else '',
-        'tempo': glob.get('@tempo', ''),
-        'topology0': glob.get('@topology0', ''),
-        'topology1': glob.get('@topology1', ''),
-        'snapshots': [],
-        'dsp0': [],
-        'dsp1': [],
-    }
-
     # Extract snapshot names
+    snapshots = []
     for i in range(8):
         snap = tone.get(f'snapshot{i}', {})
         if snap.get('@valid', False):
-            preset_info['snapshots'].append(snap.get('@name', f'Snapshot {i}'))
+            name = snap.get('@name')
+            snapshots.append(sys.intern(name) if isinstance(name, str) else f'Snapshot {i}')
 
-    # Extract blocks from each DSP
-    for dsp_name in ['dsp0', 'dsp1']:
-        dsp = tone.get(dsp_name, {})
-        blocks = []
-        for key, val in dsp.items():
-            if not isinstance(val, dict) or '@model' not in val:
-                continue
-            model_id = val['@model']
-            # Skip routing infrastructure
-            if model_id.startswith('HD2_AppDSP'):
+    source = Path(filepath).name if not setlist_name else f"{setlist_name} #{setlist_index:03d}"
+    return Preset(
+        name=meta.get('name', Path(filepath).stem if not setlist_name else f'Preset {setlist_index}'),
+        file=source,
+        setlist=setlist_name or '',
+        setlist_index=setlist_index if setlist_index is not None else '',
+        tempo=glob.get('@tempo', ''),
+        topology0=sys.intern(glob.get('@topology0', '')),
+        topology1=sys.intern(glob.get('@topology1', '')),
+        snapshots=tuple(snapshots),
+        tone=tone,
+        params=params,
+    )
+
+
+# ─── Decoded Preset Cache ───
+# The parse_preset()/extract_blocks() output of a setlist is pickled to
+# <cache_dir>/<sha256 of encoded_data>.pickle. Each entry also records the
+# MODEL_DB rows for every model id it references, so editing MODEL_DB only
+# invalidates the setlists that actually use the edited models. Bump
+# CACHE_FORMAT whenever parsing code changes what gets stored.
+
+CACHE_FORMAT = 4
+DEFAULT_CACHE_DIR = os.environ.get('HELIX_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'helix-native-presets')
+
+
+def _referenced_models(presets_raw):
+    """Return {model_id: MODEL_DB row or None} for every model used on a DSP."""
+    models = {}
+    for p in presets_raw:
+        tone = p.get('tone', {})
+        for dsp_name in ['dsp0', 'dsp1']:
+            dsp = tone.get(dsp_name, {})
+            if not isinstance(dsp, dict):
                 continue
-            cat, name, based_on = lookup_model(model_id)
-            blocks.append({
-                'block': key,
-                'position': val.get('@position', 99),
-                'path': val.get('@path', 0),
-                'enabled': val.get('@enabled', True),
-                'model_id': model_id,
-                'category': cat,
-                'name': name,
-                'based_on': based_on,
-                'type': val.get('@type', ''),
-                'stereo': val.get('@stereo', False),
-            })
-        blocks.sort(key=lambda b: (b['path'], b['position']))
-        preset_info[dsp_name] = blocks
-
-    return preset_info
+            for val in dsp.values():
+                if isinstance(val, dict) and '@model' in val:
+                    models[val['@model']] = MODEL_DB.get(val['@model'])
+    return models
+
+
+def _read_cache_entry(path, setlist_name):
+    # A truncated, foreign or stale-format pickle can fail in any number of
+    # ways; every one of them just means the entry is rebuilt.
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+        if (not isinstance(entry, dict) or entry.get('format') != CACHE_FORMAT
+                or entry.get('setlist') != setlist_name):
+            return None
+        for model_id, row in entry['models'].items():
+            if MODEL_DB.get(model_id) != row:
+                return None
+    except Exception:
+        return None
+    return entry
+
+
+def write_cache_entry(path, entry):
+    """Pickle `entry` to `path` atomically, creating its directory.
+
+    Failures only print a warning: a cache that cannot be written is rebuilt
+    on the next run. Other tools use this for their own cache files too.
+    """
+    cache_dir = os.path.dirname(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Warning: could not write cache {path}: {e}")
+
+
+def load_parsed_setlist(filepath, cache_dir=None, params=False):
+    """Return (setlist_name, presets, blocks) for a .hls file.
+
+    `presets` holds the parse_preset() result for every preset and `blocks`
+    its blocks in signal-flow order (Preset.routing.blocks). With a
+    cache_dir, results are read from and written to the on-disk cache;
+    params=True output is cached separately.
+    """
+    # Only a cache lookup needs the payload hashed before it is decoded
+    path = None
+    if cache_dir:
+        digest = hashlib.sha256()
+        header = _scan_hls_envelope(filepath, digest)
+        setlist_name = header.get('meta', {}).get('name', Path(filepath).stem)
+        suffix = '.params.pickle' if params else '.pickle'
+        path = os.path.join(cache_dir, digest.hexdigest() + suffix)
+        entry = _read_cache_entry(path, setlist_name)
+        if entry is not None:
+            for info in entry['presets']:
+                count_unknown_models(info.blocks)
+            return setlist_name, entry['presets'], entry['blocks']
+
+    setlist_name, presets_raw = load_setlist(filepath)
+    presets = []
+    blocks = []
+    for i, p in enumerate(presets_raw):
+        wrapped = {'data': {'meta': p.get('meta', {}), 'tone': p.get('tone', {})}}
+        info = parse_preset(filepath, override_data=wrapped, setlist_name=setlist_name,
+                            setlist_index=i, params=params)
+        presets.append(info)
+        blocks.append(list(info.routing.blocks))
+
+    if path:
+        write_cache_entry(path, {
+            'format': CACHE_FORMAT,
+            'setlist': setlist_name,
+            'models': _referenced_models(presets_raw),
+            'presets': presets,
+            'blocks': blocks,
+        })
+    return setlist_name, presets, blocks
 
 
 def format_signal_chain(blocks):
-    """Format blocks into a readable signal chain string."""
+    """Format blocks into a readable signal chain string, one line per path.
+
+    This is the chain listing from before routing was modelled: it ignores
+    splits, joins and DSP links. Presets use RoutingGraph.chain() instead;
+    this remains for plain block dicts without routing, which print_preset()
+    and export_csv() are given when called with mappings.
+    """
     if not blocks:
         return "(empty)"
     path0 = [b for b in blocks if b['path'] == 0]
@@ -529,8 +1887,12 @@ def format_signal_chain(blocks):
     return result
 
 
-def print_preset(info):
-    """Pretty-print a parsed preset."""
+def print_preset(info, snapshots=False):
+    """Pretty-print a parsed preset; with snapshots=True, also each snapshot's chain.
+
+    `info` may also be a plain mapping with the Preset fields; its chains are
+    then listed per path by format_signal_chain() and snapshots are skipped.
+    """
     print(f"\n{'═' * 70}")
     print(f"  PRESET: {info['name']}")
     print(f"{'═' * 70}")
@@ -551,46 +1913,102 @@ def print_preset(info):
         cab_strs = [c['name'] + ' (' + c['based_on'] + ')' for c in cabs]
         print(f"  Cab(s): {', '.join(cab_strs)}")
 
-    for dsp_name, label in [('dsp0', 'DSP 0'), ('dsp1', 'DSP 1')]:
-        blocks = info[dsp_name]
-        if blocks:
+    is_preset = isinstance(info, Preset)
+    if is_preset:
+        chains = info.chains
+    else:
+        chains = (format_signal_chain(info['dsp0']), format_signal_chain(info['dsp1']))
+    for dsp_name, label, chain in zip(('dsp0', 'dsp1'), ('DSP 0', 'DSP 1'), chains):
+        if info[dsp_name]:
             print(f"\n  {label} Signal Chain:")
-            chain = format_signal_chain(blocks)
             for line in chain.split('\n'):
                 print(f"    {line}")
 
+    states = info.snapshot_states if snapshots and is_preset else None
+    if states is not None:
+        blocks = info.blocks
+        for number, name in info.iter_snapshots():
+            print(f"\n  Snapshot {number + 1} ({name}):")
+            for d, (label, dsp_name) in enumerate((('DSP 0', 'dsp0'), ('DSP 1', 'dsp1'))):
+                if info[dsp_name]:
+                    print(f"    {label}: {info.routing.chain(d, states.active(number))}")
+            for j, param, value in states.overrides(number):
+                print(f"    {blocks[j].name} {param} = {value:g}")
+
     # Summary table
-    cats = {}
-    for b in all_blocks:
-        cats.setdefault(b['category'], []).append(b['name'])
+    if is_preset:
+        cats = info.categories
+    else:
+        cats = {}
+        for b in all_blocks:
+            cats.setdefault(b['category'], []).append(b['name'])
     print(f"\n  Block Summary:")
     for cat in ['Amp', 'Preamp', 'Cab', 'Drive', 'Delay', 'Mod', 'Reverb',
                 'Comp', 'EQ', 'Filter', 'Wah', 'Pitch', 'Synth', 'Utility',
                 'FX Loop', 'Looper', 'Unknown']:
         if cat in cats:
-            print(f"    {cat}: {', '.join(cats[cat])}")
+            line = f"    {cat}: {', '.join(cats[cat])}"
+            if states is not None and states.valid:
+                on = _bits(states.snapshots_enabling(info.slot_mask(cat)))
+                line += f" (on in snapshots {', '.join(str(s + 1) for s in on)})" if on else " (off in all snapshots)"
+            print(line)
+
+
+def snapshot_toggles(info):
+    """Summarize the blocks each snapshot switches, e.g. 'SNAPSHOT 2: -Simple Delay +Plate'."""
+    parts = []
+    for number, name in info.iter_snapshots():
+        on, off = info.snapshot_changes(number)
+        if on or off:
+            parts.append(f"{name}: " + ' '.join([f"+{b.name}" for b in on] + [f"-{b.name}" for b in off]))
+    return '; '.join(parts)
+
+
+# Write buffer for export_csv; rows are small, so batch them into large writes
+CSV_BUFFER_SIZE = 1 << 20
+CSV_OTHER_CATEGORIES = ('EQ', 'Filter', 'Wah', 'Pitch', 'Synth', 'Utility',
+                        'FX Loop', 'Looper', 'Unknown')
 
 
 def export_csv(presets, filepath):
-    """Export presets to CSV."""
-    with open(filepath, 'w', newline='') as f:
+    """Export presets to CSV.
+
+    `presets` can be any iterable, such as a generator over parsing output;
+    each row is written as soon as its preset arrives. Plain preset mappings
+    such as dict(preset) have no routing, so their blocks are listed DSP by
+    DSP and their Snapshot Toggles are left empty.
+    """
+    with open(filepath, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
         writer = csv.writer(f)
         writer.writerow([
             'Preset Name', 'File', 'Tempo', 'Snapshots',
             'Amp(s)', 'Cab(s)', 'Drive(s)', 'Delay(s)', 'Mod(s)',
             'Reverb(s)', 'Comp(s)', 'Other Effects',
             'DSP0 Chain', 'DSP1 Chain',
-            'Total Blocks', 'Categories Used'
+            'Total Blocks', 'Categories Used', 'Amp Make(s)', 'Snapshot Toggles'
         ])
         for info in presets:
-            all_blocks = info['dsp0'] + info['dsp1']
+            # One pass over the blocks (in signal-flow order for a Preset) builds
+            # the category lists
             by_cat = {}
-            for b in all_blocks:
-                by_cat.setdefault(b['category'], []).append(b['name'])
+            makes = []
+            if isinstance(info, Preset):
+                blocks = info.routing.blocks
+                chains = info.chains
+                toggles = snapshot_toggles(info)
+            else:
+                blocks = info['dsp0'] + info['dsp1']
+                chains = (format_signal_chain(info['dsp0']), format_signal_chain(info['dsp1']))
+                toggles = ''
+            for b in blocks:
+                category = b['category']
+                by_cat.setdefault(category, []).append(b['name'])
+                make = b['manufacturer']
+                if make and category in ('Amp', 'Preamp') and make not in makes:
+                    makes.append(make)
 
             other = []
-            for cat in ['EQ', 'Filter', 'Wah', 'Pitch', 'Synth', 'Utility',
-                        'FX Loop', 'Looper', 'Unknown']:
+            for cat in CSV_OTHER_CATEGORIES:
                 if cat in by_cat:
                     other.extend([f"[{cat}] {n}" for n in by_cat[cat]])
 
@@ -607,60 +2025,115 @@ def export_csv(presets, filepath):
                 '; '.join(by_cat.get('Reverb', [])),
                 '; '.join(by_cat.get('Comp', [])),
                 '; '.join(other),
-                format_signal_chain(info['dsp0']).replace('\n', ' | '),
-                format_signal_chain(info['dsp1']).replace('\n', ' | '),
-                len(all_blocks),
-                ', '.join(sorted(by_cat.keys()))
+                chains[0],
+                chains[1],
+                len(blocks),
+                ', '.join(sorted(by_cat.keys())),
+                '; '.join(makes),
+                toggles,
             ])
     print(f"\nCSV exported to: {filepath}")
 
 
+# Overview sheet: categories with their own column, and the fill each gets
+XLSX_CATEGORY_FILLS = {
+    'Amp': "FFE0B2", 'Cab': "FFF9C4", 'Drive': "FFCDD2", 'Delay': "B3E5FC",
+    'Mod': "C8E6C9", 'Reverb': "D1C4E9", 'Comp': "F0F4C3", 'Synth': "F8BBD0",
+}
+
+
+def _xlsx_styles(wb):
+    """Register the named styles export_xlsx uses and return their names.
+
+    Write-only sheets can't be restyled cell by cell after the fact, so every
+    style combination is registered once up front and cells refer to it by name.
+    """
+    from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
+
+    header_font = Font(bold=True, color="FFFFFF", size=11, name="Arial")
+    header_fill = PatternFill("solid", fgColor="333333")
+    wrap = Alignment(wrap_text=True, vertical='top')
+    styles = [
+        NamedStyle('helix_header', font=header_font, fill=header_fill,
+                   alignment=Alignment(horizontal='center')),
+        NamedStyle('helix_chain_header', font=header_font, fill=header_fill),
+        NamedStyle('helix_body', font=copy(DEFAULT_FONT), alignment=wrap),
+        NamedStyle('helix_preset', font=Font(bold=True, name="Arial"), alignment=wrap),
+    ]
+    for cat, color in XLSX_CATEGORY_FILLS.items():
+        styles.append(NamedStyle(f'helix_{cat}', font=copy(DEFAULT_FONT), alignment=wrap,
+                                 fill=PatternFill("solid", fgColor=color)))
+    for style in styles:
+        wb.add_named_style(style)
+
+
 def export_xlsx(presets, filepath):
-    """Export presets to a formatted Excel spreadsheet."""
+    """Export presets to a formatted Excel spreadsheet.
+
+    `presets` can be any iterable; it is read once and rows are streamed to a
+    write-only workbook, so memory use does not grow with the library size.
+    Plain preset mappings such as dict(preset) have no routing or snapshot
+    states, so their blocks are listed DSP by DSP and they get no rows on the
+    Snapshots sheet.
+    """
     try:
         from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+        from openpyxl.cell import WriteOnlyCell
     except ImportError:
         print("openpyxl not installed. Install with: pip3 install openpyxl")
         print("Falling back to CSV export.")
         export_csv(presets, filepath.replace('.xlsx', '.csv'))
         return
 
-    wb = Workbook()
+    wb = Workbook(write_only=True)
+    _xlsx_styles(wb)
 
-    # ── Sheet 1: Overview ──
-    ws = wb.active
-    ws.title = "Preset Overview"
-
-    header_font = Font(bold=True, color="FFFFFF", size=11, name="Arial")
-    header_fill = PatternFill("solid", fgColor="333333")
-    cat_fills = {
-        'Amp': PatternFill("solid", fgColor="FFE0B2"),
-        'Cab': PatternFill("solid", fgColor="FFF9C4"),
-        'Drive': PatternFill("solid", fgColor="FFCDD2"),
-        'Delay': PatternFill("solid", fgColor="B3E5FC"),
-        'Mod': PatternFill("solid", fgColor="C8E6C9"),
-        'Reverb': PatternFill("solid", fgColor="D1C4E9"),
-        'Comp': PatternFill("solid", fgColor="F0F4C3"),
-        'Synth': PatternFill("solid", fgColor="F8BBD0"),
-    }
+    def styled(ws, value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
 
+    # ── Sheet 1: Overview ──
+    ws = wb.create_sheet("Preset Overview")
+    widths = [5, 24, 14, 8, 28, 24, 24, 20, 20, 18, 18, 28, 10, 18]
+    for i, w in enumerate(widths, 1):
+        letter = chr(64 + i) if i <= 26 else 'A' + chr(64 + i - 26)
+        ws.column_dimensions[letter].width = w
     headers = ['#', 'Preset Name', 'Setlist', 'Tempo', 'Amp(s)', 'Cab(s)',
                'Drive', 'Delay', 'Mod', 'Reverb', 'Comp',
-               'Other', 'Total Blocks']
-    for col, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-
-    for row, info in enumerate(presets, 2):
+               'Other', 'Total Blocks', 'Amp Make(s)']
+    ws.append([styled(ws, h, 'helix_header') for h in headers])
+
+    # ── Sheet 2: Signal Chains ──
+    ws2 = wb.create_sheet("Signal Chains")
+    for i, w in enumerate([20, 8, 8, 8, 10, 10, 22, 28, 8, 8, 16], 1):
+        col_letter = chr(64 + i) if i <= 26 else 'A' + chr(64 + i - 26)
+        ws2.column_dimensions[col_letter].width = w
+    headers2 = ['Preset', 'DSP', 'Position', 'Path', 'Block', 'Category',
+                'Name', 'Based On', 'Enabled', 'Stereo', 'Manufacturer']
+    ws2.append([styled(ws2, h, 'helix_chain_header') for h in headers2])
+
+    # ── Sheet 3: Snapshots ──
+    ws3 = wb.create_sheet("Snapshots")
+    for i, w in enumerate([20, 9, 14, 40, 40, 24, 24, 30], 1):
+        ws3.column_dimensions[chr(64 + i)].width = w
+    headers3 = ['Preset', 'Snapshot', 'Name', 'DSP0 Chain', 'DSP1 Chain',
+                'Switched On', 'Switched Off', 'Parameter Values']
+    ws3.append([styled(ws3, h, 'helix_chain_header') for h in headers3])
+
+    # All sheets are filled in the same pass over the presets
+    for number, info in enumerate(presets, 1):
         all_blocks = info['dsp0'] + info['dsp1']
         by_cat = {}
+        makes = []
         for b in all_blocks:
             by_cat.setdefault(b['category'], []).append(
                 f"{b['name']} ({b['based_on']})" if b['based_on'] and 'Unknown' not in b['based_on'] else b['name']
             )
+            make = b['manufacturer']
+            if make and b['category'] in ('Amp', 'Preamp') and make not in makes:
+                makes.append(make)
 
         other = []
         for cat in ['EQ', 'Filter', 'Wah', 'Pitch', 'Synth', 'Utility',
@@ -668,78 +2141,1093 @@ def export_xlsx(presets, filepath):
             if cat in by_cat:
                 other.extend(by_cat[cat])
 
-        ws.cell(row=row, column=1, value=row - 1)
-        ws.cell(row=row, column=2, value=info['name']).font = Font(bold=True, name="Arial")
-        ws.cell(row=row, column=3, value=info.get('setlist', ''))
-        ws.cell(row=row, column=4, value=round(info['tempo'], 1) if info['tempo'] else None)
-        ws.cell(row=row, column=5, value='\n'.join(by_cat.get('Amp', [])))
-        ws.cell(row=row, column=6, value='\n'.join(by_cat.get('Cab', [])))
-        ws.cell(row=row, column=7, value='\n'.join(by_cat.get('Drive', [])))
-        ws.cell(row=row, column=8, value='\n'.join(by_cat.get('Delay', [])))
-        ws.cell(row=row, column=9, value='\n'.join(by_cat.get('Mod', [])))
-        ws.cell(row=row, column=10, value='\n'.join(by_cat.get('Reverb', [])))
-        ws.cell(row=row, column=11, value='\n'.join(by_cat.get('Comp', [])))
-        ws.cell(row=row, column=12, value='\n'.join(other))
-        ws.cell(row=row, column=13, value=len(all_blocks))
-
-        # Apply category color fills
-        for col, cat in [(5, 'Amp'), (6, 'Cab'), (7, 'Drive'), (8, 'Delay'),
-                         (9, 'Mod'), (10, 'Reverb'), (11, 'Comp'), (12, 'Synth')]:
-            if cat in by_cat:
-                ws.cell(row=row, column=col).fill = cat_fills.get(cat, PatternFill())
+        row = [
+            styled(ws, number, 'helix_body'),
+            styled(ws, info['name'], 'helix_preset'),
+            styled(ws, info.get('setlist', ''), 'helix_body'),
+            styled(ws, round(info['tempo'], 1) if info['tempo'] else None, 'helix_body'),
+        ]
+        # Category columns get their category's fill when the preset uses it
+        for cat in ['Amp', 'Cab', 'Drive', 'Delay', 'Mod', 'Reverb', 'Comp']:
+            row.append(styled(ws, '\n'.join(by_cat.get(cat, [])),
+                              f'helix_{cat}' if cat in by_cat else 'helix_body'))
+        row.append(styled(ws, '\n'.join(other),
+                          'helix_Synth' if 'Synth' in by_cat else 'helix_body'))
+        row.append(styled(ws, len(all_blocks), 'helix_body'))
+        row.append(styled(ws, '\n'.join(makes), 'helix_body'))
+        ws.append(row)
+
+        is_preset = isinstance(info, Preset)
+        for b in info.routing.blocks if is_preset else all_blocks:
+            ws2.append([
+                info['name'],
+                b['dsp'].upper(),
+                b['position'],
+                f"Path {'B' if b['path'] == 1 else 'A'}",
+                b['block'],
+                b['category'],
+                b['name'],
+                b['based_on'],
+                'Yes' if b['enabled'] else 'No',
+                'Stereo' if b['stereo'] else 'Mono',
+                b['manufacturer'] or '',
+            ])
 
-        # Wrap text
-        for col in range(1, 14):
-            ws.cell(row=row, column=col).alignment = Alignment(wrap_text=True, vertical='top')
+        if not is_preset:
+            continue
+        states = info.snapshot_states
+        for snapshot, name in info.iter_snapshots():
+            on, off = info.snapshot_changes(snapshot)
+            ws3.append([
+                info['name'],
+                snapshot + 1,
+                name,
+                info.routing.chain(0, states.active(snapshot)),
+                info.routing.chain(1, states.active(snapshot)),
+                ', '.join(b.name for b in on),
+                ', '.join(b.name for b in off),
+                '\n'.join(f"{all_blocks[j].name} {param} = {value:g}"
+                          for j, param, value in states.overrides(snapshot)),
+            ])
 
-    # Column widths
-    widths = [5, 24, 14, 8, 28, 24, 24, 20, 20, 18, 18, 28, 10]
-    for i, w in enumerate(widths, 1):
-        letter = chr(64 + i) if i <= 26 else 'A' + chr(64 + i - 26)
-        ws.column_dimensions[letter].width = w
+    wb.save(filepath)
+    print(f"\nExcel spreadsheet exported to: {filepath}")
 
-    # ── Sheet 2: Signal Chains ──
-    ws2 = wb.create_sheet("Signal Chains")
-    headers2 = ['Preset', 'DSP', 'Position', 'Path', 'Block', 'Category',
-                'Name', 'Based On', 'Enabled', 'Stereo']
-    for col, h in enumerate(headers2, 1):
-        cell = ws2.cell(row=1, column=col, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
 
-    row = 2
+# ─── Columnar Export ───
+# Writes every block as a column-oriented table: one NumPy .npy file per
+# column plus columns.json holding the string dictionaries. .npy files are
+# written with the stdlib `array` module (no NumPy needed to export) and can
+# be memory-mapped with numpy.load(path, mmap_mode='r') or load_columns().
+
+COLUMNS_FORMAT = 2
+
+# column name -> (array typecode, .npy descr)
+COLUMN_TYPES = {
+    # one row per preset
+    'preset_name': ('i', '<i4'),          # -> dictionaries['preset_name']
+    'preset_setlist': ('i', '<i4'),       # -> dictionaries['setlist']
+    'preset_index': ('i', '<i4'),         # setlist slot, -1 for .hlx files
+    'preset_tempo': ('d', '<f8'),         # NaN when absent
+    'preset_snapshots': ('B', '|u1'),     # bit s set when snapshot s is in use
+    # one row per block
+    'block_preset': ('i', '<i4'),         # row in the preset columns
+    'block_dsp': ('b', '|i1'),
+    'block_path': ('b', '|i1'),
+    'block_position': ('h', '<i2'),
+    'block_model': ('i', '<i4'),          # -> dictionaries['model_id']
+    'block_category': ('h', '<i2'),       # -> dictionaries['category']
+    'block_enabled': ('B', '|b1'),
+    'block_stereo': ('B', '|b1'),
+    'block_snapshots': ('B', '|u1'),      # bit s set when the block is on in snapshot s
+    'block_param_start': ('q', '<i8'),    # CSR offsets into param_*, n_blocks + 1
+    # one row per numeric block parameter
+    'param_block': ('i', '<i4'),          # row in the block columns
+    'param_name': ('i', '<i4'),           # -> dictionaries['param_name']
+    'param_value': ('d', '<f8'),
+    # one row per snapshot-controlled parameter value
+    'override_block': ('i', '<i4'),       # row in the block columns
+    'override_snapshot': ('b', '|i1'),
+    'override_param': ('i', '<i4'),       # -> dictionaries['param_name']
+    'override_value': ('d', '<f8'),
+}
+
+
+def _write_npy(path, typecode, descr, values):
+    """Write an array.array as a version 1.0 .npy file."""
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(typecode, values)
+        values.byteswap()
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # Magic + version + length field + header must be a multiple of 64 bytes
+    pad = 64 - (10 + len(header) + 1) % 64
+    header = header + ' ' * pad + '\n'
+    with open(path, 'wb') as f:
+        f.write(b'\x93NUMPY\x01\x00')
+        f.write(len(header).to_bytes(2, 'little'))
+        f.write(header.encode('latin1'))
+        values.tofile(f)
+
+
+class _Dictionary:
+    """Dictionary-encodes strings to dense integer codes."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def export_columns(presets, dirpath):
+    """Export presets and their blocks as a columnar table in `dirpath`.
+
+    Parameters are only included for presets parsed with params=True.
+    `presets` can be any iterable; nothing but the column arrays is kept.
+    """
+    os.makedirs(dirpath, exist_ok=True)
+    cols = {name: array(typecode) for name, (typecode, _) in COLUMN_TYPES.items()}
+    names, setlists, models, categories, param_names = (
+        _Dictionary(), _Dictionary(), _Dictionary(), _Dictionary(), _Dictionary())
+    cols['block_param_start'].append(0)
+
+    n_presets = 0
     for info in presets:
-        for dsp_name in ['dsp0', 'dsp1']:
+        row = n_presets
+        n_presets += 1
+        cols['preset_name'].append(names.code(info['name']))
+        cols['preset_setlist'].append(setlists.code(info['setlist']))
+        idx = info['setlist_index']
+        cols['preset_index'].append(idx if idx != '' else -1)
+        cols['preset_tempo'].append(float(info['tempo']) if info['tempo'] != '' else float('nan'))
+        states = info['snapshot_states']
+        cols['preset_snapshots'].append(states.valid if states else 0)
+        first_block = len(cols['block_preset'])
+        slot = 0
+        for dsp_no, dsp_name in enumerate(['dsp0', 'dsp1']):
             for b in info[dsp_name]:
-                ws2.cell(row=row, column=1, value=info['name'])
-                ws2.cell(row=row, column=2, value=dsp_name.upper())
-                ws2.cell(row=row, column=3, value=b['position'])
-                ws2.cell(row=row, column=4, value=f"Path {'B' if b['path'] == 1 else 'A'}")
-                ws2.cell(row=row, column=5, value=b['block'])
-                ws2.cell(row=row, column=6, value=b['category'])
-                ws2.cell(row=row, column=7, value=b['name'])
-                ws2.cell(row=row, column=8, value=b['based_on'])
-                ws2.cell(row=row, column=9, value='Yes' if b['enabled'] else 'No')
-                ws2.cell(row=row, column=10, value='Stereo' if b['stereo'] else 'Mono')
-                row += 1
-
-    for i, w in enumerate([20, 8, 8, 8, 10, 10, 22, 28, 8, 8], 1):
-        col_letter = chr(64 + i) if i <= 26 else 'A' + chr(64 + i - 26)
-        ws2.column_dimensions[col_letter].width = w
+                block_row = len(cols['block_preset'])
+                cols['block_preset'].append(row)
+                cols['block_dsp'].append(dsp_no)
+                cols['block_path'].append(b['path'])
+                cols['block_position'].append(b['position'])
+                cols['block_model'].append(models.code(b['model_id']))
+                cols['block_category'].append(categories.code(b['category']))
+                cols['block_enabled'].append(bool(b['enabled']))
+                cols['block_stereo'].append(bool(b['stereo']))
+                cols['block_snapshots'].append(
+                    states.by_block[slot] if states and slot < len(states.by_block) else 0)
+                slot += 1
+                for pname, value in sorted((getattr(b, 'params', None) or {}).items()):
+                    cols['param_block'].append(block_row)
+                    cols['param_name'].append(param_names.code(pname))
+                    cols['param_value'].append(value)
+                cols['block_param_start'].append(len(cols['param_block']))
+        if states:
+            for snapshot in _bits(states.valid):
+                for j, pname, value in states.overrides(snapshot):
+                    cols['override_block'].append(first_block + j)
+                    cols['override_snapshot'].append(snapshot)
+                    cols['override_param'].append(param_names.code(pname))
+                    cols['override_value'].append(value)
+
+    for name, (typecode, descr) in COLUMN_TYPES.items():
+        _write_npy(os.path.join(dirpath, name + '.npy'), typecode, descr, cols[name])
+    with open(os.path.join(dirpath, 'columns.json'), 'w') as f:
+        json.dump({
+            'format': COLUMNS_FORMAT,
+            'presets': n_presets,
+            'blocks': len(cols['block_preset']),
+            'params': len(cols['param_block']),
+            'overrides': len(cols['override_block']),
+            'columns': {name: descr for name, (_, descr) in COLUMN_TYPES.items()},
+            'dictionaries': {
+                'preset_name': names.values,
+                'setlist': setlists.values,
+                'model_id': models.values,
+                'category': categories.values,
+                'param_name': param_names.values,
+            },
+        }, f)
+    print(f"\nColumnar table exported to: {dirpath} "
+          f"({n_presets} presets, {len(cols['block_preset'])} blocks)")
+
+
+def load_columns(dirpath):
+    """Memory-map a table written by export_columns().
+
+    Returns (columns, meta): columns maps each column name to a read-only
+    memoryview over the mapped file, meta is the parsed columns.json.
+    """
+    import mmap
+    with open(os.path.join(dirpath, 'columns.json')) as f:
+        meta = json.load(f)
+    if meta.get('format') != COLUMNS_FORMAT:
+        raise ValueError(f"{dirpath}: unsupported columnar format {meta.get('format')}")
+    columns = {}
+    for name, (typecode, _) in COLUMN_TYPES.items():
+        with open(os.path.join(dirpath, name + '.npy'), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{dirpath}: empty column file {name}.npy")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_len = int.from_bytes(mm[8:10], 'little')
+        view = memoryview(mm)[10 + header_len:]
+        columns[name] = view.cast(typecode)
+    return columns, meta
+
+
+# ─── Compiled Library ───
+# A .hlib file holds parsed presets from any number of setlists for random
+# access without decoding anything else:
+#
+#   header    LIBRARY_HEADER: magic, format, preset count, meta offset/length
+#   offsets   (presets + 1) little-endian u64 record offsets
+#   records   one compact binary record per preset, in setlist order
+#   meta      JSON: the setlists ({name, source, start, count}) and the
+#             string table that records refer to by index
+#
+# PresetLibrary memory-maps the file, so fetching a preset reads two table
+# entries and that preset's record. Bump LIBRARY_FORMAT whenever the record
+# layout changes.
+
+LIBRARY_FORMAT = 3
+LIBRARY_MAGIC = b'HELXLIB\n'
+LIBRARY_HEADER = struct.Struct('<8sIIQQ')
+_LIB_OFFSETS = struct.Struct('<QQ')
+_LIB_STR = struct.Struct('<H')
+# tempo, flags, topology0, topology1, snapshot count, block counts per DSP
+_LIB_PRESET = struct.Struct('<dBIIBHH')
+# model id, block key, position, path, flags, type (-1 for ''), param count
+_LIB_BLOCK = struct.Struct('<IIhbBhH')
+_LIB_PARAM = struct.Struct('<Id')
+_LIB_STRING_REF = struct.Struct('<I')
+# valid snapshots, bytes per enabled bitset, snapshot-controlled parameter count
+_LIB_STATES = struct.Struct('<BBH')
+_LIB_CONTROLLED = struct.Struct('<HI')
+
+_LIB_NO_TEMPO = 1
+_LIB_INT_TEMPO = 2
+_LIB_HAS_STATES = 4
+_LIB_HAS_ROUTING = 8
+_LIB_ENABLED = 1
+_LIB_STEREO = 2
+_LIB_PARAMS = 4
+
+
+def bank_slot_index(label):
+    """Return the setlist index of a bank/slot label such as '25B' (0-based: 97)."""
+    label = label.strip().upper()
+    if len(label) < 2 or not label[:-1].isdigit() or not 'A' <= label[-1] <= 'D':
+        raise ValueError(f"not a bank/slot label: {label!r}")
+    return (int(label[:-1]) - 1) * 4 + ord(label[-1]) - 65
+
+
+def _pack_preset(info, strings):
+    name = info['name'].encode('utf-8')
+    tempo = info['tempo']
+    states = info['snapshot_states']
+    flags = ((_LIB_NO_TEMPO if tempo == '' else 0) | (_LIB_INT_TEMPO if isinstance(tempo, int) else 0)
+             | (_LIB_HAS_STATES if states is not None else 0)
+             | (_LIB_HAS_ROUTING if info['routing_spec'] is not None else 0))
+    parts = [_LIB_STR.pack(len(name)), name,
+             _LIB_PRESET.pack(float(tempo) if tempo != '' else 0.0, flags,
+                              strings.code(info['topology0']), strings.code(info['topology1']),
+                              len(info['snapshots']), len(info['dsp0']), len(info['dsp1']))]
+    parts.extend(_LIB_STRING_REF.pack(strings.code(n)) for n in info['snapshots'])
+    for b in info['dsp0'] + info['dsp1']:
+        params = b.params
+        flags = ((_LIB_ENABLED if b.enabled else 0) | (_LIB_STEREO if b.stereo else 0)
+                 | (_LIB_PARAMS if params is not None else 0))
+        parts.append(_LIB_BLOCK.pack(strings.code(b.model_id), strings.code(b.block),
+                                     b.position, b.path, flags,
+                                     -1 if b.type == '' else b.type, len(params or ())))
+        for pname, value in (params or {}).items():
+            parts.append(_LIB_PARAM.pack(strings.code(pname), value))
+    if states is not None:
+        width = (max(e.bit_length() for e in states.enabled) + 7) // 8
+        parts.append(_LIB_STATES.pack(states.valid, width, len(states.controlled)))
+        parts.extend(e.to_bytes(width, 'little') for e in states.enabled)
+        parts.extend(_LIB_CONTROLLED.pack(j, strings.code(param)) for j, param in states.controlled)
+        values = array('d', states.values)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        parts.append(values.tobytes())
+    if info['routing_spec'] is not None:
+        # Most presets share a handful of routings, so the string table dedupes them
+        parts.append(_LIB_STRING_REF.pack(strings.code(json.dumps(info['routing_spec']))))
+    return b''.join(parts)
+
+
+def compile_library(hls_files, path, cache_dir=None):
+    """Compile .hls setlists (parsed with params) into a .hlib library; return the preset count."""
+    strings = _Dictionary()
+    setlists = []
+    records = []
+    for fp in hls_files:
+        setlist_name, presets, _ = load_parsed_setlist(fp, cache_dir, params=True)
+        setlists.append({'name': setlist_name, 'source': Path(fp).stem,
+                         'start': len(records), 'count': len(presets)})
+        records.extend(_pack_preset(info, strings) for info in presets)
+
+    meta = json.dumps({'setlists': setlists, 'strings': strings.values}).encode('utf-8')
+    table = array('Q', [0])
+    pos = LIBRARY_HEADER.size + 8 * (len(records) + 1)
+    table[0] = pos
+    for rec in records:
+        pos += len(rec)
+        table.append(pos)
+    if sys.byteorder == 'big':
+        table.byteswap()
+
+    out_dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(LIBRARY_HEADER.pack(LIBRARY_MAGIC, LIBRARY_FORMAT, len(records), pos, len(meta)))
+        table.tofile(f)
+        for rec in records:
+            f.write(rec)
+        f.write(meta)
+    os.replace(tmp, path)
+    return len(records)
+
+
+class PresetLibrary:
+    """Read-only, memory-mapped view of a .hlib library written by compile_library().
+
+    lib[i] returns the i-th preset of the whole library; lib.preset(setlist,
+    slot) looks one up by setlist name (or source file stem) and index or
+    bank/slot label. Both decode only the requested record.
+    """
+
+    def __init__(self, path):
+        import mmap
+        self.path = str(path)
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < LIBRARY_HEADER.size:
+                raise ValueError(f"{path}: not a preset library")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, self._count, meta_at, meta_len = LIBRARY_HEADER.unpack_from(self._mm)
+        if magic != LIBRARY_MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a preset library")
+        if fmt != LIBRARY_FORMAT:
+            self.close()
+            raise ValueError(f"{path}: unsupported library format {fmt}")
+        meta = json.loads(self._mm[meta_at:meta_at + meta_len].decode('utf-8'))
+        self._strings = [sys.intern(v) for v in meta['strings']]
+        self._counted = bytearray(self._count)    # records tallied in UNKNOWN_MODELS
+        self._routing_specs = {}                  # string ref -> decoded routing spec
+        self._setlists = meta['setlists']
+        self._starts = [sl['start'] for sl in self._setlists]
+        self._by_name = {}
+        for sl in reversed(self._setlists):
+            self._by_name[sl['source']] = sl
+            self._by_name[sl['name']] = sl
+
+    @property
+    def setlists(self):
+        """(name, source file stem, range of library indices) per setlist, in library order."""
+        return [(sl['name'], sl['source'], range(sl['start'], sl['start'] + sl['count']))
+                for sl in self._setlists]
+
+    def setlist_range(self, setlist):
+        """Return the range of library indices holding a setlist's presets."""
+        try:
+            sl = self._by_name[setlist]
+        except KeyError:
+            raise KeyError(f"no setlist {setlist!r} in {self.path}") from None
+        return range(sl['start'], sl['start'] + sl['count'])
+
+    def preset(self, setlist, slot):
+        """Return a setlist's preset by index (0-based) or bank/slot label ('25B')."""
+        index = bank_slot_index(slot) if isinstance(slot, str) else slot
+        presets = self.setlist_range(setlist)
+        if not 0 <= index < len(presets):
+            raise IndexError(f"{setlist} has no preset {slot}")
+        return self[presets[index]]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(f"library index {i} out of range")
+        mm, strings = self._mm, self._strings
+        pos, _ = _LIB_OFFSETS.unpack_from(mm, LIBRARY_HEADER.size + 8 * i)
+
+        (n,) = _LIB_STR.unpack_from(mm, pos)
+        name = mm[pos + 2:pos + 2 + n].decode('utf-8')
+        pos += 2 + n
+        tempo, flags, topo0, topo1, n_snap, n_dsp0, n_dsp1 = _LIB_PRESET.unpack_from(mm, pos)
+        pos += _LIB_PRESET.size
+        if flags & _LIB_NO_TEMPO:
+            tempo = ''
+        elif flags & _LIB_INT_TEMPO:
+            tempo = int(tempo)
+        snapshots = tuple(strings[_LIB_STRING_REF.unpack_from(mm, pos + 4 * k)[0]]
+                          for k in range(n_snap))
+        pos += 4 * n_snap
+
+        dsps = []
+        for dsp_name, n_blocks in (('dsp0', n_dsp0), ('dsp1', n_dsp1)):
+            blocks = []
+            for _ in range(n_blocks):
+                model, key, position, path, bflags, btype, n_params = _LIB_BLOCK.unpack_from(mm, pos)
+                pos += _LIB_BLOCK.size
+                params = None
+                if bflags & _LIB_PARAMS:
+                    params = {}
+                    for _ in range(n_params):
+                        pname, value = _LIB_PARAM.unpack_from(mm, pos)
+                        params[strings[pname]] = value
+                        pos += _LIB_PARAM.size
+                blocks.append(Block(dsp_name, strings[key], strings[model], position, path,
+                                    bool(bflags & _LIB_ENABLED), bool(bflags & _LIB_STEREO),
+                                    '' if btype < 0 else btype, params))
+            dsps.append(tuple(blocks))
+
+        states = None
+        if flags & _LIB_HAS_STATES:
+            valid, width, n_controlled = _LIB_STATES.unpack_from(mm, pos)
+            pos += _LIB_STATES.size
+            enabled = [int.from_bytes(mm[pos + width * s:pos + width * (s + 1)], 'little')
+                       for s in range(SNAPSHOT_COUNT)]
+            pos += width * SNAPSHOT_COUNT
+            controlled = []
+            for _ in range(n_controlled):
+                j, param = _LIB_CONTROLLED.unpack_from(mm, pos)
+                controlled.append((j, strings[param]))
+                pos += _LIB_CONTROLLED.size
+            values = array('d', mm[pos:pos + 8 * SNAPSHOT_COUNT * n_controlled])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            states = SnapshotStates(valid, enabled, controlled, values)
+            pos += 8 * SNAPSHOT_COUNT * n_controlled
+
+        spec = None
+        if flags & _LIB_HAS_ROUTING:
+            spec = self._routing_spec(_LIB_STRING_REF.unpack_from(mm, pos)[0])
+
+        if not self._counted[i]:
+            self._counted[i] = 1
+            count_unknown_models(dsps[0] + dsps[1])
+        sl = self._setlists[bisect_right(self._starts, i) - 1]
+        index = i - sl['start']
+        return Preset(name, f"{sl['name']} #{index:03d}", sl['name'], index, tempo,
+                      strings[topo0], strings[topo1], snapshots, dsps[0], dsps[1], states, spec)
+
+    def _routing_spec(self, ref):
+        # Presets built from the same template share their spec
+        spec = self._routing_specs.get(ref)
+        if spec is None:
+            spec = self._routing_specs[ref] = tuple(
+                tuple(dspec[:7]) + (tuple(tuple(link) for link in dspec[7]),)
+                for dspec in json.loads(self._strings[ref]))
+        return spec
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ─── Parameter Matrices ───
+# Library-wide numeric analysis: one NumPy matrix per model, one row per
+# block instance and one column per parameter name seen for that model.
+# Requires presets parsed with params=True.
+
+class ParamMatrix:
+    """Numeric parameters of every instance of one model.
+
+    values[i, j] is parameter columns[j] of instance i (NaN where that block
+    lacks it); presets[i] and blocks[i] identify where instance i came from.
+    """
+
+    __slots__ = ('model_id', 'columns', 'values', 'presets', 'blocks')
+
+    def __init__(self, model_id, columns, values, presets, blocks):
+        self.model_id = model_id
+        self.columns = columns
+        self.values = values
+        self.presets = presets
+        self.blocks = blocks
+
+    def column(self, name):
+        """Return the values of one parameter across all instances."""
+        return self.values[:, self.columns.index(name)]
+
+    def means(self):
+        """Return {parameter: mean over the instances that set it}."""
+        import numpy as np
+        return dict(zip(self.columns, np.nanmean(self.values, axis=0).tolist()))
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __repr__(self):
+        return f"ParamMatrix({self.model_id}: {len(self.blocks)}x{len(self.columns)})"
+
+
+def param_matrices(presets):
+    """Build a ParamMatrix per model id from presets parsed with params=True."""
+    import numpy as np
+    grouped = {}
+    for info in presets:
+        for b in info['dsp0'] + info['dsp1']:
+            if b.params is None:
+                raise ValueError(f"{info['file']}: parse with params=True to build parameter matrices")
+            grouped.setdefault(b.model_id, []).append((info, b))
+
+    matrices = {}
+    for model_id, instances in grouped.items():
+        columns = sorted({name for _, b in instances for name in b.params})
+        col_index = {name: j for j, name in enumerate(columns)}
+        rows, cols, vals = [], [], []
+        for i, (_, b) in enumerate(instances):
+            for name, value in b.params.items():
+                rows.append(i)
+                cols.append(col_index[name])
+                vals.append(value)
+        values = np.full((len(instances), len(columns)), np.nan)
+        values[rows, cols] = vals
+        matrices[model_id] = ParamMatrix(model_id, columns, values,
+                                         [info for info, _ in instances],
+                                         [b for _, b in instances])
+    return matrices
+
+
+def print_param_stats(presets):
+    """Print instance counts and per-parameter means for every model used."""
+    try:
+        matrices = param_matrices(presets)
+    except ImportError:
+        print("numpy not installed. Install with: pip3 install numpy")
+        return
+    print(f"\n{'═' * 70}")
+    print(f"  PARAMETER STATISTICS ({len(matrices)} models)")
+    print(f"{'═' * 70}")
+    for model_id in sorted(matrices, key=lambda m: lookup_model(m)[:2]):
+        m = matrices[model_id]
+        cat, name, based_on = lookup_model(model_id)
+        print(f"\n  [{cat}] {name} ({based_on}) — {len(m)} instance(s)")
+        for param, mean in m.means().items():
+            print(f"    {param:24s} {mean:10.3f}")
+
+
+# ─── Preset Index ───
+# A SQLite database of parsed presets, their blocks, snapshots and
+# parameters, for questions that span a whole library. Refreshing only
+# re-parses files whose contents changed: size and mtime are compared
+# first, then the sha256 of the file. Text columns that queries filter on
+# compare case-insensitively and are indexed. Bump INDEX_FORMAT whenever
+# the schema or what gets stored changes; the index is then rebuilt.
+
+INDEX_FORMAT = 1
+DEFAULT_INDEX = os.path.join(DEFAULT_CACHE_DIR, 'presets.sqlite')
+
+# blocks.slot is the block's index in Preset.blocks (the bit used by
+# snapshots.enabled); blocks.flow its index in signal-flow order, and bit k
+# of blocks.upstream is set when the block at flow index k feeds it.
+# params rows with a NULL snapshot hold the preset's own values, the others
+# a snapshot's value for a snapshot-controlled parameter.
+INDEX_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime_ns INTEGER, digest TEXT);
+CREATE TABLE presets (
+    id INTEGER PRIMARY KEY, file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    setlist TEXT COLLATE NOCASE, setlist_index INTEGER, slot TEXT, name TEXT COLLATE NOCASE,
+    tempo REAL, topology0 TEXT, topology1 TEXT, chain0 TEXT, chain1 TEXT);
+CREATE TABLE blocks (
+    id INTEGER PRIMARY KEY, preset_id INTEGER REFERENCES presets(id) ON DELETE CASCADE,
+    slot INTEGER, flow INTEGER, upstream INTEGER, dsp TEXT, block TEXT, path INTEGER,
+    position INTEGER, model_id TEXT COLLATE NOCASE, category TEXT COLLATE NOCASE,
+    name TEXT COLLATE NOCASE, based_on TEXT COLLATE NOCASE,
+    manufacturer TEXT COLLATE NOCASE, enabled INTEGER, stereo INTEGER);
+CREATE TABLE snapshots (
+    preset_id INTEGER REFERENCES presets(id) ON DELETE CASCADE, snapshot INTEGER,
+    name TEXT COLLATE NOCASE, enabled INTEGER, chain0 TEXT, chain1 TEXT);
+CREATE TABLE params (
+    block_id INTEGER REFERENCES blocks(id) ON DELETE CASCADE, snapshot INTEGER,
+    name TEXT COLLATE NOCASE, value REAL);
+CREATE INDEX presets_file ON presets(file_id);
+CREATE INDEX presets_setlist ON presets(setlist);
+CREATE INDEX presets_name ON presets(name);
+CREATE INDEX blocks_preset ON blocks(preset_id);
+CREATE INDEX blocks_model ON blocks(model_id);
+CREATE INDEX blocks_category ON blocks(category);
+CREATE INDEX snapshots_preset ON snapshots(preset_id);
+CREATE INDEX params_block ON params(block_id, name);
+"""
 
-    wb.save(filepath)
-    print(f"\nExcel spreadsheet exported to: {filepath}")
+
+def bank_slot_label(index):
+    """Return the bank/slot label of a setlist index (97: '25B'), the inverse of bank_slot_index()."""
+    return f"{index // 4 + 1:02d}{chr(65 + index % 4)}"
+
+
+def _models_digest():
+    return hashlib.sha256(json.dumps(sorted(MODEL_DB.items())).encode('utf-8')).hexdigest()
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HLS_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_index(path=DEFAULT_INDEX, readonly=False):
+    """Open a preset index, creating it (unless readonly) if missing or out of date.
+
+    A read-only index of another INDEX_FORMAT raises ValueError. Block names
+    are stored as looked up, so an index built with a different MODEL_DB is
+    emptied and every file gets parsed again on the next refresh.
+    """
+    if readonly:
+        db = sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path)
+    try:
+        meta = dict(db.execute('SELECT key, value FROM meta'))
+    except sqlite3.DatabaseError:
+        meta = {}
+    if readonly:
+        if meta.get('format') != str(INDEX_FORMAT):
+            db.close()
+            raise ValueError(f"{path} is not a format {INDEX_FORMAT} preset index; rebuild it")
+        return db
+
+    if meta.get('format') != str(INDEX_FORMAT):
+        tables = [row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            db.execute(f'DROP TABLE "{table}"')
+        db.executescript(INDEX_SCHEMA)
+        meta = {'format': str(INDEX_FORMAT)}
+    db.execute('PRAGMA foreign_keys = ON')
+    with db:
+        if meta.get('models') != _models_digest():
+            db.execute('DELETE FROM files')
+        db.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                       [('format', str(INDEX_FORMAT)), ('models', _models_digest())])
+    return db
+
+
+def _flow_order(info):
+    """Return {block slot: (flow index, upstream bitset)} from the preset's RoutingGraph."""
+    graph = info.routing
+    flow = {}
+    upstream = [0] * len(graph.nodes)
+    for n in graph.order:
+        kind, _, _, slot = graph.nodes[n]
+        mask = upstream[n]
+        if kind == 'block':
+            flow[slot] = (len(flow), mask)
+            mask |= 1 << flow[slot][0]
+        for m in graph.edges[n]:
+            upstream[m] |= mask
+    return flow
+
+
+def _index_presets(db, file_id, presets):
+    for info in presets:
+        index = info['setlist_index']
+        tempo = info['tempo']
+        preset_id = db.execute(
+            'INSERT INTO presets VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (file_id, info['setlist'] or None, None if index == '' else index,
+             None if index == '' else bank_slot_label(index), info['name'],
+             None if tempo == '' else tempo, info['topology0'], info['topology1'])
+            + info.chains).lastrowid
+        flow = _flow_order(info)
+        block_ids = []
+        for j, b in enumerate(info.blocks):
+            order, upstream = flow.get(j, (None, 0))
+            block_id = db.execute(
+                'INSERT INTO blocks VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (preset_id, j, order, upstream, b.dsp, b.block, b.path, b.position, b.model_id,
+                 b.category, b.name, b.based_on, b.manufacturer, int(bool(b.enabled)),
+                 int(bool(b.stereo)))).lastrowid
+            block_ids.append(block_id)
+            if b.params:
+                db.executemany('INSERT INTO params VALUES (?, NULL, ?, ?)',
+                               [(block_id, name, value) for name, value in b.params.items()])
+        states = info.snapshot_states
+        for s, name in info.iter_snapshots():
+            active = states.active(s)
+            db.execute('INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?)',
+                       (preset_id, s, name, active, info.routing.chain(0, active),
+                        info.routing.chain(1, active)))
+            db.executemany('INSERT INTO params VALUES (?, ?, ?, ?)',
+                           [(block_ids[j], s, param, value)
+                            for j, param, value in states.overrides(s)])
+
+
+def build_index(hls_files, hlx_files, path=DEFAULT_INDEX, cache_dir=None, jobs=1):
+    """Bring the preset index at `path` up to date with the given files.
+
+    Files are (re)parsed, with params, only if new or changed since the last
+    refresh; indexed files that no longer exist are dropped, other indexed
+    files are kept. Returns (files parsed, files unchanged, files removed).
+    """
+    db = open_index(path)
+    try:
+        with db:
+            known = {row[0]: row[1:] for row in
+                     db.execute('SELECT path, id, size, mtime_ns, digest FROM files')}
+            changed = {}
+            unchanged = 0
+            for fp in list(hls_files) + list(hlx_files):
+                real = os.path.realpath(fp)
+                st = os.stat(real)
+                row = known.get(real)
+                if row and row[1:3] == (st.st_size, st.st_mtime_ns):
+                    unchanged += 1
+                    continue
+                digest = _file_digest(real)
+                if row and row[3] == digest:
+                    db.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?',
+                               (st.st_size, st.st_mtime_ns, row[0]))
+                    unchanged += 1
+                    continue
+                changed[real] = (st.st_size, st.st_mtime_ns, digest)
+
+            removed = [row[0] for p, row in known.items() if not os.path.exists(p)]
+            db.executemany('DELETE FROM files WHERE id = ?', [(file_id,) for file_id in removed])
+
+            hls = [fp for fp in changed if fp.endswith('.hls')]
+            hlx = [fp for fp in changed if not fp.endswith('.hls')]
+            parsed = 0
+            for kind, fp, infos, error in parse_files(hls, hlx, cache_dir, jobs, params=True):
+                if error is not None:
+                    print(f"Error parsing {fp}: {error}")
+                    continue
+                db.execute('DELETE FROM files WHERE path = ?', (fp,))
+                file_id = db.execute('INSERT INTO files VALUES (NULL, ?, ?, ?, ?)',
+                                     (fp,) + changed[fp]).lastrowid
+                _index_presets(db, file_id, infos)
+                parsed += 1
+    finally:
+        db.close()
+    return parsed, unchanged, len(removed)
+
+
+# Filter fields: preset columns, then block columns. Values of numeric
+# fields are compared as numbers; `slot` takes a bank/slot label.
+FILTER_PRESET_FIELDS = {'name': 'p.name', 'setlist': 'p.setlist', 'slot': 'p.setlist_index',
+                        'tempo': 'p.tempo', 'topology': 'p.topology0'}
+FILTER_BLOCK_FIELDS = {'model': 'model_id', 'category': 'category', 'block': 'name',
+                       'based_on': 'based_on', 'manufacturer': 'manufacturer', 'dsp': 'dsp',
+                       'enabled': 'enabled', 'stereo': 'stereo'}
+_FILTER_NUMERIC = ('tempo', 'enabled', 'stereo')
+_FILTER_BOOLEANS = {'on': 1, 'off': 0, 'yes': 1, 'no': 0, 'true': 1, 'false': 0}
+_FILTER_TERM_RE = re.compile(r'(\w+(?:\.[^!=<>~]+)?)(!=|<=|>=|=|~|<|>)(.*)$', re.S)
+
+
+def _filter_condition(term):
+    """Return (kind, column or param name, SQL operator, value) for one field<op>value term."""
+    m = _FILTER_TERM_RE.match(term)
+    if not m:
+        raise ValueError(f"bad filter term {term!r}; expected field=value")
+    field, op, value = m.groups()
+    key = field.lower()
+    if op == '~':
+        op, value = 'LIKE', f"%{value}%"
+    elif key == 'slot':
+        value = bank_slot_index(value)
+    elif key in _FILTER_NUMERIC or key.startswith('param.'):
+        value = _FILTER_BOOLEANS.get(value.lower(), value)
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"{field} expects a number, got {value!r}") from None
+    if key.startswith('param.'):
+        return 'param', field[6:], op, value
+    if key == 'snapshot':
+        return 'snapshot', 'name', op, value
+    if key in FILTER_PRESET_FIELDS:
+        return 'preset', FILTER_PRESET_FIELDS[key], op, value
+    if key in FILTER_BLOCK_FIELDS:
+        return 'block', FILTER_BLOCK_FIELDS[key], op, value
+    raise ValueError(f"unknown filter field {field!r}; choose from "
+                     f"{', '.join(list(FILTER_PRESET_FIELDS) + list(FILTER_BLOCK_FIELDS))}, "
+                     f"snapshot or param.NAME")
+
+
+def compile_filter(expr):
+    """Translate a filter expression into (SQL, parameters) selecting matching presets.
+
+    Terms are field<op>value with op one of = != < > <= >= and ~ (contains),
+    and must all match. Comma-joined block terms must match the same block,
+    `A -> B` matches when a block matching B is fed by one matching A, and a
+    leading '-' negates a term. For example:
+
+        model=HD2_AmpBritPlexi -> category=Delay setlist~factory
+        category=Amp,param.Drive>0.7 -category=Reverb snapshot~lead
+    """
+    tokens = shlex.split(expr)
+    where, args = [], []
+    i = 0
+    while i < len(tokens):
+        negate = tokens[i].startswith('-') and tokens[i] != '->'
+        group = [tokens[i][1:] if negate else tokens[i]]
+        while i + 2 < len(tokens) and tokens[i + 1] == '->':
+            group.append(tokens[i + 2])
+            i += 2
+        i += 1
+
+        conds = [[_filter_condition(t) for t in term.split(',')] for term in group]
+        kinds = {c[0] for term in conds for c in term}
+        if kinds <= {'preset', 'snapshot'} and len(kinds) == 1 and len(group) == 1:
+            tests = ' AND '.join(f"{col} {op} ?" for _, col, op, _ in conds[0])
+            args.extend(value for *_, value in conds[0])
+            if kinds == {'preset'}:
+                sql = f"({tests})"
+            else:
+                sql = f"p.id IN (SELECT preset_id FROM snapshots WHERE {tests})"
+        elif kinds & {'preset', 'snapshot'}:
+            raise ValueError(f"only block and param.NAME fields can be chained or combined "
+                             f"with other fields: {' -> '.join(group)}")
+        else:
+            joins, tests = [], []
+            for k, term in enumerate(conds):
+                b = f"b{k}"
+                if k:
+                    joins.append(f"JOIN blocks {b} ON {b}.preset_id = b0.preset_id "
+                                 f"AND ({b}.upstream >> b{k - 1}.flow) & 1")
+                for kind, col, op, value in term:
+                    if kind == 'param':
+                        tests.append(f"EXISTS (SELECT 1 FROM params WHERE block_id = {b}.id "
+                                     f"AND snapshot IS NULL AND name = ? AND value {op} ?)")
+                        args.extend((col, value))
+                    else:
+                        tests.append(f"{b}.{col} {op} ?")
+                        args.append(value)
+            sql = (f"p.id IN (SELECT b0.preset_id FROM {' '.join(['blocks b0'] + joins)} "
+                   f"WHERE {' AND '.join(tests)})")
+        where.append(f"NOT {sql}" if negate else sql)
+
+    return ("SELECT p.setlist, p.slot, p.name, p.tempo FROM presets p"
+            + (f" WHERE {' AND '.join(where)}" if where else '') + " ORDER BY p.id"), args
+
+
+def query_index(query, path=DEFAULT_INDEX, limit=None):
+    """Run a filter expression, or SQL if it starts with SELECT or WITH, on a preset index.
+
+    Returns (column names, rows). The index is opened read-only.
+    """
+    if query.lstrip()[:6].upper() == 'SELECT' or query.lstrip()[:4].upper() == 'WITH':
+        sql, args = query, []
+    else:
+        sql, args = compile_filter(query)
+    db = open_index(path, readonly=True)
+    try:
+        cur = db.execute(sql, args)
+        rows = cur.fetchmany(limit) if limit else cur.fetchall()
+        return [d[0] for d in cur.description or ()], rows
+    finally:
+        db.close()
+
+
+def print_rows(columns, rows, max_width=48):
+    """Print query results as an aligned table."""
+    def cell(v):
+        if v is None:
+            return ''
+        text = f"{v:g}" if isinstance(v, float) else str(v)
+        return text if len(text) <= max_width else text[:max_width - 1] + '…'
+
+    cells = [[cell(v) for v in row] for row in rows]
+    widths = [max([len(c)] + [len(r[k]) for r in cells]) for k, c in enumerate(columns)]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)).rstrip())
+    print('  '.join('─' * w for w in widths))
+    for r in cells:
+        print('  '.join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+
+
+# ─── Multi-File Parsing ───
+
+def _parse_file_job(job):
+    """Parse one .hls or .hlx file; returns (presets, error message)."""
+    kind, path, cache_dir, params = job
+    try:
+        if kind == 'hls':
+            return load_parsed_setlist(path, cache_dir, params)[1], None
+        return [parse_preset(path, params=params).decode()], None
+    except Exception as e:
+        return None, str(e)
+
+
+def _scan_names_job(job):
+    """List one .hls or .hlx file's preset names; returns ([(name, tempo)], error message)."""
+    kind, path, tempo = job
+    try:
+        if kind == 'hls':
+            return list(scan_hls_names(path, tempo)), None
+        info = parse_preset(path)
+        return [(info['name'], info['tempo'] if tempo else '')], None
+    except Exception as e:
+        return None, str(e)
+
+
+def _run_file_jobs(func, tasks, jobs):
+    """Yield (task, result) for func over tasks, in order, in a process pool if jobs > 1."""
+    if jobs > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        # Batch small .hlx jobs so IPC overhead doesn't dominate big folders
+        chunksize = max(1, min(64, len(tasks) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            yield from zip(tasks, pool.map(func, tasks, chunksize=chunksize))
+    else:
+        for task in tasks:
+            yield task, func(task)
+
+
+def parse_files(hls_files, hlx_files, cache_dir=None, jobs=1, params=False):
+    """Parse setlists, then single presets, yielding (kind, path, presets, error).
+
+    With jobs > 1 the files are decoded and parsed in a process pool. Results
+    are still yielded in input order, so output is the same as a serial run.
+    """
+    tasks = [('hls', str(fp), cache_dir, params) for fp in hls_files]
+    tasks += [('hlx', str(fp), cache_dir, params) for fp in hlx_files]
+    pooled = jobs > 1 and len(tasks) > 1
+    for task, (infos, error) in _run_file_jobs(_parse_file_job, tasks, jobs):
+        if pooled and infos:
+            # The workers' tallies stay in their own processes
+            for info in infos:
+                count_unknown_models(info.blocks)
+        yield task[0], task[1], infos, error
+
+
+def scan_names(hls_files, hlx_files, tempo=False, jobs=1):
+    """Like parse_files(), but yield (kind, path, [(name, tempo)], error) from a name scan."""
+    tasks = [('hls', str(fp), tempo) for fp in hls_files]
+    tasks += [('hlx', str(fp), tempo) for fp in hlx_files]
+    for task, (names, error) in _run_file_jobs(_scan_names_job, tasks, jobs):
+        yield task[0], task[1], names, error
+
+
+def print_names(results):
+    """Print the preset names of scan_names() results."""
+    count = 0
+    for kind, fp, names, error in results:
+        if error is not None:
+            print(f"Error parsing {'setlist ' if kind == 'hls' else ''}{fp}: {error}")
+            continue
+        if kind == 'hls':
+            print(f"Setlist: {Path(fp).stem} — {len(names)} presets")
+        for i, (name, bpm) in enumerate(names):
+            label = f"#{i:03d}" if kind == 'hls' else Path(fp).name
+            line = f"  {label}  {name}"
+            if bpm:
+                line += f"  ({bpm:.1f} BPM)"
+            print(line)
+        count += len(names)
+    print(f"\nTotal presets: {count}")
+
+
+def library_preset(library, spec):
+    """Return the preset of a PresetLibrary named by a 'SETLIST:SLOT' spec.
+
+    SLOT is a 0-based index or a bank/slot label such as '25B'. Raises
+    ValueError with a printable message when the spec names no preset.
+    """
+    setlist, sep, slot = spec.rpartition(':')
+    if not sep or not setlist or not slot:
+        raise ValueError(f"expected SETLIST:SLOT (such as 'FACTORY 1:25B'), got {spec!r}")
+    try:
+        return library.preset(setlist, int(slot) if slot.isdigit() else slot)
+    except (KeyError, IndexError) as e:
+        # str() of a KeyError is the repr of its message
+        raise ValueError(e.args[0]) from None
+
+
+def iter_library(library, spec=None):
+    """Yield parse_files()-style results from a PresetLibrary.
+
+    Every setlist is yielded as one ('hls', source, presets, None) result;
+    with a 'SETLIST:SLOT' spec only that preset is, as an 'hlx' result.
+    """
+    if spec:
+        try:
+            info = library_preset(library, spec)
+        except ValueError as e:
+            yield 'hlx', spec, None, str(e)
+            return
+        yield 'hlx', spec, [info], None
+        return
+    for _, source, presets in library.setlists:
+        yield 'hls', source, [library[i] for i in presets], None
+
+
+def query_main(args):
+    """`helix_parser.py query [--index DB] [--limit N] EXPRESSION`: print matching presets."""
+    path = DEFAULT_INDEX
+    limit = None
+    words = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--index' and i + 1 < len(args):
+            path = args[i + 1]
+            i += 2
+        elif args[i] == '--limit' and i + 1 < len(args):
+            try:
+                limit = int(args[i + 1])
+            except ValueError:
+                print(f"Error: --limit expects a number, got {args[i + 1]}")
+                sys.exit(1)
+            i += 2
+        else:
+            words.append(args[i])
+            i += 1
+
+    if not os.path.isfile(path):
+        print(f"Error: no preset index at {path}; build one with "
+              f"python3 helix_parser.py <path> --index {path}")
+        sys.exit(1)
+    start = time.perf_counter()
+    try:
+        columns, rows = query_index(' '.join(words), path, limit)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print_rows(columns, rows)
+    print(f"\n{len(rows)} row{'s' if len(rows) != 1 else ''} ({elapsed * 1000:.1f} ms)")
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        query_main(sys.argv[2:])
+        return
     if len(sys.argv) < 2:
-        print("Usage: python3 helix_parser.py <path> [--xlsx out.xlsx] [--csv out.csv]")
-        print("  <path> can be a single .hlx file or a folder of .hlx files")
+        print("Usage: python3 helix_parser.py <path> [--xlsx out.xlsx] [--csv out.csv]"
+              " [--columns DIR] [--param-stats] [--cache-dir DIR] [--no-cache] [--jobs N]")
+        print("       python3 helix_parser.py <path> --names [--tempo] [--jobs N]")
+        print("       python3 helix_parser.py <path> --compile library.hlib")
+        print("       python3 helix_parser.py <path> --index [presets.sqlite]")
+        print("       python3 helix_parser.py query [--index presets.sqlite] [--limit N] "
+              "'model=HD2_AmpBritPlexi -> category=Delay' | 'SELECT ...'")
+        print("  <path> can be a single .hlx file or a folder of .hlx files, or a compiled")
+        print("  .hlib library (--preset 'SETLIST:25B' picks one preset from it)")
+        print("  --names only lists preset names (with --tempo, their tempos), much faster")
+        print("  --snapshots also prints each snapshot's signal chain and parameter values")
+        print("  --columns DIR writes every block and numeric parameter as .npy columns")
+        print("  --param-stats prints per-model parameter means (needs numpy)")
+        print("  --jobs N parses files in N worker processes (0 = one per CPU)")
         sys.exit(1)
 
     target = sys.argv[1]
     xlsx_out = None
     csv_out = None
+    columns_out = None
+    param_stats = False
+    names = False
+    tempo = False
+    library_out = None
+    index_out = None
+    preset_spec = None
+    show_snapshots = False
+    cache_dir = DEFAULT_CACHE_DIR
+    jobs = 1
 
     # Parse optional args
     for i, arg in enumerate(sys.argv[2:], 2):
@@ -747,11 +3235,45 @@ def main():
             xlsx_out = sys.argv[i + 1]
         elif arg == '--csv' and i + 1 < len(sys.argv):
             csv_out = sys.argv[i + 1]
+        elif arg == '--columns' and i + 1 < len(sys.argv):
+            columns_out = sys.argv[i + 1]
+        elif arg == '--param-stats':
+            param_stats = True
+        elif arg == '--names':
+            names = True
+        elif arg == '--tempo':
+            tempo = True
+        elif arg == '--snapshots':
+            show_snapshots = True
+        elif arg == '--compile' and i + 1 < len(sys.argv):
+            library_out = sys.argv[i + 1]
+        elif arg == '--index':
+            has_path = i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith('--')
+            index_out = sys.argv[i + 1] if has_path else DEFAULT_INDEX
+        elif arg == '--preset' and i + 1 < len(sys.argv):
+            preset_spec = sys.argv[i + 1]
+        elif arg == '--cache-dir' and i + 1 < len(sys.argv):
+            cache_dir = sys.argv[i + 1]
+        elif arg == '--no-cache':
+            cache_dir = None
+        elif arg == '--jobs' and i + 1 < len(sys.argv):
+            try:
+                jobs = int(sys.argv[i + 1]) or os.cpu_count() or 1
+            except ValueError:
+                print(f"Error: --jobs expects a number, got {sys.argv[i + 1]}")
+                sys.exit(1)
 
     # Collect .hlx and .hls files
     hlx_files = []
     hls_files = []
-    if os.path.isfile(target):
+    library = None
+    if os.path.isfile(target) and target.endswith('.hlib'):
+        try:
+            library = PresetLibrary(target)
+        except (OSError, ValueError) as e:
+            print(f"Error opening library {target}: {e}")
+            sys.exit(1)
+    elif os.path.isfile(target):
         if target.endswith('.hlx'):
             hlx_files = [target]
         elif target.endswith('.hls'):
@@ -766,49 +3288,98 @@ def main():
         print(f"Error: {target} not found")
         sys.exit(1)
 
-    if not hlx_files and not hls_files:
+    if library is None and not hlx_files and not hls_files:
         print(f"No .hlx or .hls files found in {target}")
         sys.exit(1)
 
-    # Parse all presets
-    presets = []
-
-    # Parse .hls setlist files
-    for fp in hls_files:
-        try:
-            entries = parse_hls_setlist(str(fp))
-            print(f"Setlist: {Path(fp).stem} — {len(entries)} presets")
-            for preset_data, sl_name, sl_idx in entries:
-                info = parse_preset(str(fp), override_data=preset_data,
-                                    setlist_name=sl_name, setlist_index=sl_idx)
-                presets.append(info)
-        except Exception as e:
-            print(f"Error parsing setlist {fp}: {e}")
-
-    # Parse individual .hlx files
-    for fp in hlx_files:
+    if preset_spec is not None:
+        if library is None:
+            print("Error: --preset needs a compiled .hlib library as the path")
+            sys.exit(1)
         try:
-            info = parse_preset(str(fp))
-            presets.append(info)
-        except Exception as e:
-            print(f"Error parsing {fp}: {e}")
+            library_preset(library, preset_spec)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
 
-    print(f"\nTotal presets parsed: {len(presets)}\n")
+    if library_out:
+        if not hls_files:
+            print(f"Error: --compile needs .hls setlists, none found in {target}")
+            sys.exit(1)
+        count = compile_library(hls_files, library_out, cache_dir)
+        print(f"Library compiled to: {library_out} ({count} presets from "
+              f"{len(hls_files)} setlists)")
+        return
 
-    # Print to terminal
-    for info in presets:
-        print_preset(info)
+    if index_out:
+        if library is not None:
+            print("Error: --index needs .hls/.hlx files, not a compiled library")
+            sys.exit(1)
+        parsed, unchanged, removed = build_index(hls_files, hlx_files, index_out, cache_dir, jobs)
+        print(f"Index updated: {index_out} ({parsed} files parsed, {unchanged} unchanged, "
+              f"{removed} removed)")
+        return
+
+    if names:
+        if library is None:
+            print_names(scan_names(hls_files, hlx_files, tempo, jobs))
+        else:
+            print_names((kind, fp, infos and [(p['name'], p['tempo'] if tempo else '') for p in infos],
+                         error) for kind, fp, infos, error in iter_library(library, preset_spec))
+        return
+
+    params = columns_out is not None or param_stats
+
+    def stream():
+        """Parse, print and yield presets: .hls setlists first, then .hlx files."""
+        count = 0
+        if library is None:
+            source = parse_files(hls_files, hlx_files, cache_dir, jobs, params)
+        else:
+            source = iter_library(library, preset_spec)
+        for kind, fp, infos, error in source:
+            if kind == 'hls':
+                if error is not None:
+                    print(f"Error parsing setlist {fp}: {error}")
+                    continue
+                print(f"Setlist: {Path(fp).stem} — {len(infos)} presets")
+            elif error is not None:
+                print(f"Error parsing {fp}: {error}")
+                continue
+            for info in infos:
+                print_preset(info, show_snapshots)
+                count += 1
+                yield info
+        print(f"\nTotal presets parsed: {count}")
+        print_unknown_models()
+
+    # A single export consumes the presets as they are parsed; anything that
+    # needs the whole library at once gets a list
+    if param_stats or columns_out or (xlsx_out and csv_out):
+        presets = list(stream())
+    else:
+        presets = stream()
+
+    if param_stats:
+        print_param_stats(presets)
 
     # Export if requested
     if xlsx_out:
         export_xlsx(presets, xlsx_out)
     if csv_out:
         export_csv(presets, csv_out)
+    if columns_out:
+        export_columns(presets, columns_out)
 
-    if not xlsx_out and not csv_out:
+    if not xlsx_out and not csv_out and not columns_out:
+        for _ in presets:
+            pass
         print(f"\n{'─' * 70}")
         print(f"Tip: Add --xlsx catalog.xlsx or --csv catalog.csv to export")
 
 
 if __name__ == '__main__':
-    main()
+    # Run from the importable module, so the Presets and Blocks the CLI
+    # caches pickle as helix_parser classes that other tools can load
+    import helix_parser
+    helix_parser.main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Helix Native Factory Preset Search
+Full-text search over the decoded preset names, descriptions, artists,
+genres and pickup notes kept in generate_latex.py.
+
+Usage:
+    python3 helix_search.py pantera
+    python3 helix_search.py "pink floyd" -k 5
+    python3 helix_search.py shoeg            # prefixes match too
+    python3 helix_search.py --match "cowboys frm dfw"
+    python3 helix_search.py --resolve /path/to/user/presets
+    python3 helix_search.py --build          # after editing the preset tables
+
+Searching only reads the prebuilt index, helix_search_index.json, so it does
+not import the LaTeX generator or decode any setlist. --build regenerates
+the index from generate_latex.py's tables and the bundled setlists, which
+supply each preset's bank/slot and signal chain.
+
+--match and --resolve map renamed or edited copies of factory presets back
+to the factory preset they came from, by fuzzy name matching.
+"""
+
+import ast
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+
+SEARCH_FORMAT = 3
+HERE = Path(__file__).resolve().parent
+INDEX_PATH = HERE / 'helix_search_index.json'
+BUNDLED_SETLISTS = ('FACTORY 1.hls', 'FACTORY 2.hls', 'TEMPLATES.hls')
+
+# ─── Tokenizing ───
+# Text is case- and accent-folded and split on anything but letters and
+# digits. Apostrophes are dropped rather than split on ("Y'all" -> yall),
+# and hyphenated or slashed words also index their joined form ("AC-30"
+# -> ac, 30, ac30). Tokens are then reduced by a small suffix stemmer.
+
+_APOSTROPHES_RE = re.compile(r"['’`]")
+_WORD_RE = re.compile(r'[a-z0-9]+(?:[-/][a-z0-9]+)*')
+_PART_RE = re.compile(r'[a-z0-9]+')
+# (suffix, replacement), first match wins; the stem keeps at least MIN_STEM chars
+_SUFFIXES = (('sses', 'ss'), ('ies', 'y'), ('ss', 'ss'), ('us', 'us'), ('is', 'is'),
+             ('s', ''), ('ing', ''), ('ed', ''), ('ly', ''), ('tion', 't'), ('sion', 's'))
+MIN_STEM = 3
+
+
+def stem(token):
+    """Strip a common English suffix and a final 'e' from a token (shoegazing -> shoegaz)."""
+    if len(token) <= MIN_STEM or token.isdigit():
+        return token
+    for suffix, repl in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) + len(repl) >= MIN_STEM:
+            token = token[:-len(suffix)] + repl
+            # Undouble what -ing and -ed leave behind: running -> runn -> run
+            if suffix in ('ing', 'ed') and len(token) > MIN_STEM and token[-1] == token[-2] \
+                    and token[-1] not in 'lsz':
+                token = token[:-1]
+            break
+    if token.endswith('e') and len(token) > MIN_STEM + 1:
+        token = token[:-1]
+    return token
+
+
+def words(text):
+    """Return the folded, unstemmed words of a text, with joined forms of hyphenated words."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = _APOSTROPHES_RE.sub('', ''.join(c for c in text if not unicodedata.combining(c)))
+    out = []
+    for m in _WORD_RE.finditer(text):
+        parts = _PART_RE.findall(m.group())
+        out.extend(parts)
+        if len(parts) > 1:
+            out.append(''.join(parts))
+    return out
+
+
+def tokenize(text):
+    """Return the stemmed index terms of a text."""
+    return [stem(w) for w in words(text)]
+
+
+# ─── Building ───
+# Every preset name is one document made of weighted fields. Postings hold
+# each term's BM25 weight in each document, summed over the fields it
+# appears in, so a search only adds up precomputed numbers.
+
+FIELD_WEIGHTS = {'name': 3.0, 'decoded': 2.5, 'artists': 3.0, 'genres': 2.5,
+                 'pickups': 0.5, 'description': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _documents(locations):
+    """Return [(preset name, {field: text}, artists, genres)] from generate_latex.py's tables.
+
+    Presets found in the setlists but missing from the tables are documents
+    too, searchable by name only.
+    """
+    from generate_latex import PRESET_INFO, PRESET_ARTISTS, PRESET_GENRES, PRESET_PICKUPS
+    names = set(locations) | set(PRESET_INFO) | set(PRESET_ARTISTS) \
+        | set(PRESET_GENRES) | set(PRESET_PICKUPS)
+    docs = []
+    for name in sorted(names, key=lambda n: (n.lower(), n)):
+        decoded, description = PRESET_INFO.get(name, ('', ''))
+        artists = PRESET_ARTISTS.get(name, [])
+        genres = PRESET_GENRES.get(name, [])
+        docs.append((name, {
+            'name': name,
+            'decoded': decoded,
+            'description': description,
+            'artists': ' '.join(artists),
+            'genres': ' '.join(genres),
+            'pickups': ' '.join(PRESET_PICKUPS.get(name, ())),
+        }, artists, genres))
+    return docs
+
+
+def _setlist_presets(hls_files):
+    """Return ({preset name: [(setlist, bank/slot)]}, {preset name: block names}).
+
+    A name's blocks are those of its first slot, as a sorted set of Helix names.
+    """
+    import helix_parser as hp
+    locations, chains = {}, {}
+    for fp in hls_files:
+        setlist, presets, _ = hp.load_parsed_setlist(fp, hp.DEFAULT_CACHE_DIR)
+        for i, info in enumerate(presets):
+            name = info['name'].strip()
+            locations.setdefault(name, []).append([setlist, hp.bank_slot_label(i)])
+            chains.setdefault(name, sorted({b.name for b in info.blocks}))
+    return locations, chains
+
+
+# The index only goes stale when what it is built from changes: the contents
+# of these tables or of the setlists. The tables are read from the source
+# with ast rather than imported, so a search can check them without loading
+# the LaTeX generator, and code changes to generate_latex.py don't count.
+SOURCE_TABLES = ('PRESET_INFO', 'PRESET_ARTISTS', 'PRESET_GENRES', 'PRESET_PICKUPS')
+
+
+def _tables_digest():
+    """Return a digest of the contents of generate_latex.py's SOURCE_TABLES."""
+    with open(HERE / 'generate_latex.py', 'rb') as f:
+        tree = ast.parse(f.read())
+    tables = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id in SOURCE_TABLES:
+            tables[node.targets[0].id] = ast.literal_eval(node.value)
+    data = json.dumps(tables, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source(hls_files):
+    """Return the 'source' entry of an index: digests of the tables and of each setlist.
+
+    Setlists in this folder are recorded by relative path, so the bundled
+    index does not depend on where the repository is checked out.
+    """
+    setlists = {}
+    for fp in hls_files:
+        path = Path(fp).resolve()
+        try:
+            key = path.relative_to(HERE).as_posix()
+        except ValueError:
+            key = str(path)
+        setlists[key] = _file_digest(path)
+    return {'tables': _tables_digest(), 'setlists': setlists}
+
+
+def build_index(hls_files=None, path=INDEX_PATH):
+    """Build the search index from generate_latex.py and the setlists; write it to `path`.
+
+    hls_files defaults to the bundled setlists. Returns the number of presets indexed.
+    """
+    if hls_files is None:
+        hls_files = [HERE / name for name in BUNDLED_SETLISTS]
+    locations, chains = _setlist_presets(hls_files)
+    docs = _documents(locations)
+
+    # Field-weighted term frequencies and lengths per document
+    tfs, lengths = [], []
+    for _, fields, _, _ in docs:
+        tf = {}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                tf[term] = tf.get(term, 0.0) + FIELD_WEIGHTS[field]
+        tfs.append(tf)
+        lengths.append(sum(tf.values()))
+    avg_length = sum(lengths) / len(lengths) if lengths else 1.0
+
+    df = {}
+    for tf in tfs:
+        for term in tf:
+            df[term] = df.get(term, 0) + 1
+    postings = {}
+    for d, (tf, length) in enumerate(zip(tfs, lengths)):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        for term, f in tf.items():
+            idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            postings.setdefault(term, []).extend((d, round(idf * f * (BM25_K1 + 1) / (f + norm), 4)))
+
+    grams = {}
+    gram_counts = []
+    for d, (name, _, _, _) in enumerate(docs):
+        doc_grams = trigrams(name)
+        gram_counts.append(len(doc_grams))
+        for g in doc_grams:
+            grams.setdefault(g, []).append(d)
+
+    vocab = sorted(postings)
+    index = {
+        'format': SEARCH_FORMAT,
+        'source': _source(hls_files),
+        'docs': [[name, fields['decoded'], locations.get(name, []), artists, genres,
+                  chains.get(name, [])]
+                 for name, fields, artists, genres in docs],
+        'vocab': vocab,
+        'postings': [postings[t] for t in vocab],
+        'trigrams': {g: grams[g] for g in sorted(grams)},
+        'trigram_counts': gram_counts,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp, path)
+    return len(docs)
+
+
+# ─── Fuzzy Name Matching ───
+# Copies of factory presets usually keep most of the name ("Cowboys from
+# DFW 2", "cowboys frm dfw"). Names are compared by the Jaccard similarity
+# of their character trigrams, each word padded as in PostgreSQL's pg_trgm
+# ("  dfw "), using trigram -> preset postings stored in the index. When
+# several names score within TIE_MARGIN of the best, the one whose signal
+# chain shares the most blocks with the copy wins.
+#
+# A generic name can look like part of a factory name ("Clean" and "BULB
+# CLEAN", "Rock" and "Rock Gaze"), so a match that is not the same name
+# must also be backed by the chain: at least MIN_CHAIN_OVERLAP of the
+# blocks shared (unrelated factory presets almost never reach half). With
+# no chain to check, names of fewer than SHORT_NAME_TRIGRAMS trigrams (one
+# word of up to six letters) need MIN_SHORT_SIMILARITY.
+
+MIN_SIMILARITY = 0.45
+MIN_SHORT_SIMILARITY = 0.7
+SHORT_NAME_TRIGRAMS = 8
+MIN_CHAIN_OVERLAP = 0.5
+TIE_MARGIN = 0.05
+
+
+def trigrams(name):
+    """Return the set of padded character trigrams of a name's folded words."""
+    grams = set()
+    for w in words(name):
+        padded = f"  {w} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _overlap(a, b):
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+# ─── Searching ───
+
+# A query word that only matches as a prefix of a term counts this much
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX = 2
+
+
+class SearchIndex:
+    """The prebuilt index, loaded from JSON.
+
+    docs[d] is [preset name, decoded name, [[setlist, bank/slot]], artists,
+    genres, block names]; postings[t] alternates document numbers and
+    weights for vocab[t], which is sorted so prefixes are a bisect away.
+    trigrams maps each name trigram to the documents whose name has it.
+    """
+
+    __slots__ = ('docs', 'vocab', 'postings', 'source', 'trigrams', 'trigram_counts', '_chains',
+                 '_matches')
+
+    def __init__(self, data):
+        if data.get('format') != SEARCH_FORMAT:
+            raise ValueError(f"search index is format {data.get('format')}, expected "
+                             f"{SEARCH_FORMAT}; rebuild it with helix_search.py --build")
+        self.docs = data['docs']
+        self.vocab = data['vocab']
+        self.postings = data['postings']
+        self.source = data['source']
+        self.trigrams = data['trigrams']
+        self.trigram_counts = data['trigram_counts']
+        self._chains = {}
+        self._matches = {}
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def is_stale(self):
+        """Whether the preset tables or the setlists changed since the index was built."""
+        try:
+            if _tables_digest() != self.source['tables']:
+                return True
+            return any(_file_digest(HERE / path) != digest
+                       for path, digest in self.source['setlists'].items())
+        except (OSError, SyntaxError, ValueError):
+            return False
+
+    def _word_scores(self, word):
+        """Return {doc: score} for one query word: its stem exactly, else as a prefix."""
+        scores = {}
+        term = stem(word)
+        i = bisect_left(self.vocab, term)
+        if i < len(self.vocab) and self.vocab[i] == term:
+            post = self.postings[i]
+            for k in range(0, len(post), 2):
+                scores[post[k]] = post[k + 1]
+        if len(word) < MIN_PREFIX:
+            return scores
+        # Prefixes are matched unstemmed: "shoeg" should not lose its "e"
+        i = bisect_left(self.vocab, word)
+        while i < len(self.vocab) and self.vocab[i].startswith(word):
+            if self.vocab[i] != term:
+                post = self.postings[i]
+                for k in range(0, len(post), 2):
+                    d = post[k]
+                    scores[d] = max(scores.get(d, 0.0), PREFIX_WEIGHT * post[k + 1])
+            i += 1
+        return scores
+
+    def search(self, query, k=10):
+        """Return up to k (score, doc) pairs matching every word of the query, best first."""
+        total = None
+        for word in dict.fromkeys(words(query)):
+            scores = self._word_scores(word)
+            if total is None:
+                total = scores
+            else:
+                total = {d: s + scores[d] for d, s in total.items() if d in scores}
+            if not total:
+                return []
+        if total is None:
+            return []
+        ranked = sorted(total.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(score, self.docs[d]) for d, score in ranked]
+
+    def match(self, name, chain=()):
+        """Return (similarity, doc) for the factory preset `name` is most likely a copy of.
+
+        `chain` is the copy's block names (the 'l6_name' of extract_blocks()
+        output), used to break near-ties and to confirm a match that is not
+        the same name. Returns None when no factory preset name is alike
+        enough, or when its chain shares too few blocks with `chain`.
+        """
+        grams = trigrams(name)
+        shared = {}
+        for g in grams:
+            for d in self.trigrams.get(g, ()):
+                shared[d] = shared.get(d, 0) + 1
+        if not shared:
+            return None
+        scored = [(n / (len(grams) + self.trigram_counts[d] - n), d) for d, n in shared.items()]
+        best = max(scored)[0]
+        short = not chain and len(grams) < SHORT_NAME_TRIGRAMS
+        if best < (MIN_SHORT_SIMILARITY if short else MIN_SIMILARITY):
+            return None
+        tied = [(s, d) for s, d in scored if s >= best - TIE_MARGIN]
+        blocks = set(chain)
+        if len(tied) > 1 and chain:
+            s, d = max(tied, key=lambda sd: (_overlap(blocks, self._chain(sd[1])), sd[0], -sd[1]))
+        else:
+            s, d = max(tied, key=lambda sd: (sd[0], -sd[1]))
+        if chain and s < 1.0 and _overlap(blocks, self._chain(d)) < MIN_CHAIN_OVERLAP:
+            return None
+        return s, self.docs[d]
+
+    def _chain(self, d):
+        chain = self._chains.get(d)
+        if chain is None:
+            chain = self._chains[d] = set(self.docs[d][5])
+        return chain
+
+    def match_many(self, presets):
+        """Return match() for each (name, chain) pair, matching each distinct pair once."""
+        out = []
+        for name, chain in presets:
+            key = (name.strip().lower(), frozenset(chain))
+            if key not in self._matches:
+                self._matches[key] = self.match(name, chain)
+            out.append(self._matches[key])
+        return out
+
+
+def print_results(results):
+    for score, (name, decoded, locations, artists, genres, _) in results:
+        print(f"  {score:6.2f}  {name}  [{_where(locations)}]")
+        if decoded:
+            print(f"          {decoded}")
+        tags = artists + genres
+        if tags:
+            print(f"          {' · '.join(tags)}")
+
+
+def _where(locations):
+    return ', '.join(f"{setlist} {slot}" for setlist, slot in locations) or "not in a setlist"
+
+
+def resolve_library(index, paths):
+    """Print the factory preset each preset in a user library was copied from."""
+    import helix_parser as hp
+    from helix_similar import collect_files
+    hls_files, hlx_files = collect_files(paths)
+    total = resolved = 0
+    for kind, fp, infos, error in hp.parse_files(hls_files, hlx_files, hp.DEFAULT_CACHE_DIR):
+        if error is not None:
+            print(f"Error parsing {fp}: {error}")
+            continue
+        if kind == 'hls':
+            print(f"Setlist: {Path(fp).stem}")
+        hits = index.match_many((info['name'], [b.name for b in info.blocks]) for info in infos)
+        for i, (info, hit) in enumerate(zip(infos, hits)):
+            label = hp.bank_slot_label(i) if kind == 'hls' else Path(fp).name
+            total += 1
+            if hit is None:
+                print(f"  {label}  {info['name']}  —  no factory match")
+                continue
+            resolved += 1
+            score, (name, decoded, locations, *_) = hit
+            print(f"  {label}  {info['name']}  →  {name} [{_where(locations)}] ({score:.2f})"
+                  + (f"  {decoded}" if decoded else ''))
+    print(f"\n{resolved} of {total} presets matched a factory preset")
+
+
+def main():
+    args = sys.argv[1:]
+    k = 10
+    build = False
+    mode = 'search'
+    query = []
+    i = 0
+    while i < len(args):
+        if args[i] == '-k' and i + 1 < len(args):
+            try:
+                k = int(args[i + 1])
+            except ValueError:
+                print(f"Error: -k expects a number, got {args[i + 1]}")
+                sys.exit(1)
+            i += 2
+        elif args[i] == '--build':
+            build = True
+            i += 1
+        elif args[i] in ('--match', '--resolve'):
+            mode = args[i][2:]
+            i += 1
+        else:
+            query.append(args[i])
+            i += 1
+
+    if build:
+        count = build_index()
+        print(f"Search index written to {INDEX_PATH.name} ({count} presets)")
+        return
+    if not query:
+        print("Usage: python3 helix_search.py <words...> [-k N]")
+        print("       python3 helix_search.py --match <preset name>")
+        print("       python3 helix_search.py --resolve <library path> [...]")
+        print("       python3 helix_search.py --build")
+        sys.exit(1)
+
+    try:
+        index = SearchIndex.load()
+    except (OSError, ValueError) as e:
+        print(f"Error loading search index: {e}")
+        sys.exit(1)
+    if index.is_stale():
+        print("Warning: the preset tables or setlists changed since the search index was built; "
+              "run helix_search.py --build", file=sys.stderr)
+    if mode == 'resolve':
+        resolve_library(index, query)
+        return
+    if mode == 'match':
+        hit = index.match(' '.join(query))
+        if hit is None:
+            print(f"No factory preset name is close to '{' '.join(query)}'")
+            return
+        print_results([hit])
+        return
+    results = index.search(' '.join(query), k)
+    if not results:
+        print(f"No presets match '{' '.join(query)}'")
+        return
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Helix Native Preset Similarity Search
+Finds the presets in a library whose signal chains and settings are closest
+to a given preset.
+
+Usage:
+    python3 helix_similar.py "Preset Name" /path/to/library [more paths...]
+    python3 helix_similar.py /path/to/preset.hlx /path/to/library -k 20
+
+Library paths can be .hls setlists, .hlx presets or folders of either.
+"""
+
+import os
+import sys
+from heapq import heappush, heappushpop
+from itertools import compress
+from operator import sub
+from pathlib import Path
+
+import helix_parser as hp
+
+# ─── MinHash / LSH Parameters ───
+# Each preset's set of model codes is reduced to NUM_HASHES min-hashes, split
+# into bands; presets sharing any band land in the same bucket and become
+# candidates. Each entry of LSH_TIERS is a rows-per-band setting, tried in
+# order until enough candidates turn up: wide bands only match near-identical
+# chains, narrow ones catch looser matches. Candidates are then re-ranked
+# exactly.
+
+NUM_HASHES = 32
+LSH_TIERS = (8, 4, 2)
+# Presets the candidate groups must hold before the LSH probe stops
+MIN_CANDIDATES = 32
+# Libraries with at most this many distinct model sets are scanned exactly
+EXACT_SCAN = 2048
+_PRIME = (1 << 61) - 1
+# Fixed coefficients so signatures are stable between runs
+_HASH_COEFFS = [((i * 0x9E3779B97F4A7C15 + 0x632BE59BD9B4E019) % _PRIME | 1,
+                 (i * 0xC2B2AE3D27D4EB4F + 0x165667B19E3779F9) % _PRIME)
+                for i in range(1, NUM_HASHES + 1)]
+
+# Weight of the model-set overlap vs. the parameter closeness in the final score
+MODEL_WEIGHT = 0.7
+PARAM_WEIGHT = 0.3
+
+
+def _popcount(x):
+    return bin(x).count('1')
+
+
+# int.bit_count() is Python 3.10+
+_popcount = getattr(int, 'bit_count', _popcount)
+
+
+def model_bits(info):
+    """Return the preset's model set as a bit vector over model codes."""
+    bits = 0
+    for b in info['dsp0'] + info['dsp1']:
+        bits |= 1 << b.model
+    return bits
+
+
+def minhash(codes):
+    """Return the MinHash signature of a set of model codes."""
+    if not codes:
+        return (0,) * NUM_HASHES
+    return tuple(min((a * c + b) % _PRIME for c in codes) for a, b in _HASH_COEFFS)
+
+
+class SimilarityIndex:
+    """Nearest-neighbour index over parsed presets.
+
+    Presets are grouped by their exact model set, and candidate model sets
+    are retrieved with LSH over their MinHash signatures. Candidates are
+    ranked by exact Jaccard similarity of the model bit vectors, and the
+    presets of the best ones are scored on the closeness of the normalized
+    parameters of the blocks they share with the query, until no later
+    group can reach the top k.
+    """
+
+    def __init__(self, presets):
+        self.presets = list(presets)
+        self.group_bits = []
+        self.group_sizes = []
+        self.group_counts = []
+        self.group_clusters = []
+        self.buckets = [[{} for _ in range(NUM_HASHES // rows)] for rows in LSH_TIERS]
+        self.ranges = {}
+
+        # Library-wide range of every (model, parameter) for normalization
+        for info in self.presets:
+            for b in info['dsp0'] + info['dsp1']:
+                for name, value in (b.params or {}).items():
+                    key = (b.model, name)
+                    lo, hi = self.ranges.get(key, (value, value))
+                    self.ranges[key] = (min(lo, value), max(hi, value))
+        # Vectors are keyed by a small int per (model, parameter), which
+        # hashes far faster than the tuple when intersecting key sets
+        self.key_ids = {key: n for n, key in enumerate(self.ranges)}
+
+        # Within a model-set group, presets with the same parameter keys form
+        # a cluster whose vectors are stored as rows of values in key order
+        groups = {}
+        clusters = {}
+        for i, info in enumerate(self.presets):
+            bits = model_bits(info)
+            g = groups.get(bits)
+            if g is None:
+                g = groups[bits] = len(self.group_bits)
+                self.group_bits.append(bits)
+                self.group_sizes.append(_popcount(bits))
+                self.group_counts.append(0)
+                self.group_clusters.append([])
+                for tier, keys in zip(self.buckets, self._band_keys(info)):
+                    for band, key in zip(tier, keys):
+                        band.setdefault(key, []).append(g)
+            self.group_counts[g] += 1
+            vec = self._param_vector(info)
+            keys = tuple(sorted(vec))
+            cluster = clusters.get((g, keys))
+            if cluster is None:
+                cluster = clusters[(g, keys)] = (keys, [], [])
+                self.group_clusters[g].append(cluster)
+            cluster[1].append(i)
+            cluster[2].append(tuple(vec[n] for n in keys))
+
+    def _param_vector(self, info):
+        """Return {key id of (model code, parameter): value scaled to 0..1}.
+
+        Values of a preset from outside the library are clipped to the
+        library's range, so closeness stays within 0..1. Parameters no
+        library preset has are left out, as they are never shared.
+        """
+        vec = {}
+        for b in info['dsp0'] + info['dsp1']:
+            for name, value in (b.params or {}).items():
+                key = (b.model, name)
+                n = self.key_ids.get(key)
+                if n is None:
+                    continue
+                lo, hi = self.ranges[key]
+                vec[n] = min(max((value - lo) / (hi - lo), 0.0), 1.0) if hi > lo else 0.0
+        return vec
+
+    @staticmethod
+    def _band_keys(info):
+        """Return the band keys of a preset for every LSH tier."""
+        sig = minhash({b.model for b in info['dsp0'] + info['dsp1']})
+        return [[sig[i:i + rows] for i in range(0, NUM_HASHES, rows)] for rows in LSH_TIERS]
+
+    def _candidates(self, info, wanted):
+        """Return the model-set groups sharing an LSH band with the query.
+
+        Tiers are probed in order until the groups found hold `wanted` presets;
+        if even the loosest tier falls short, or the library is small enough
+        to scan, every group is a candidate.
+        """
+        if len(self.group_bits) <= EXACT_SCAN:
+            return range(len(self.group_bits))
+        found = set()
+        for tier, keys in zip(self.buckets, self._band_keys(info)):
+            for band, key in zip(tier, keys):
+                found.update(band.get(key, ()))
+            if sum(self.group_counts[g] for g in found) >= wanted:
+                return found
+        return range(len(self.group_bits))
+
+    def query(self, info, k=10, exclude=None):
+        """Return up to k (score, jaccard, param closeness, preset) tuples, best first.
+
+        `exclude` is an index into self.presets to leave out (the query itself).
+        Falls back to every model set in the library when LSH finds too few
+        candidates. Every preset of a candidate group whose model overlap can
+        still reach the top k is scored, so ties go to the earliest preset.
+        """
+        if k <= 0:
+            return []
+        bits = model_bits(info)
+        size = _popcount(bits)
+        groups = self._candidates(info, max(k, MIN_CANDIDATES) + (exclude is not None))
+
+        # (-jaccard, group) so a plain sort puts the best overlap first
+        ranked = []
+        group_bits, group_sizes = self.group_bits, self.group_sizes
+        for g in groups:
+            common = _popcount(bits & group_bits[g])
+            union = size + group_sizes[g] - common
+            ranked.append((-common / union if union else -1.0, g))
+        ranked.sort()
+
+        # Parameter closeness can lift a preset by at most PARAM_WEIGHT, so
+        # stop once the model overlap alone can no longer reach the top k
+        vec = self._param_vector(info)
+        scored = []
+        top = []    # min-heap of the k best scores so far
+        for jaccard, g in ranked:
+            jaccard = -jaccard
+            base = MODEL_WEIGHT * jaccard
+            if len(top) >= k and base + PARAM_WEIGHT < top[0]:
+                break
+            for keys, members, rows in self.group_clusters[g]:
+                mask = [n in vec for n in keys]
+                shared = sum(mask)
+                if not shared:
+                    # No parameter in common: closeness is 0 for the whole
+                    # cluster, and the earliest presets win the tie
+                    for i in members[:k + 1]:
+                        if i != exclude:
+                            scored.append((-base, i, jaccard, 0.0))
+                            if len(top) < k:
+                                heappush(top, base)
+                            else:
+                                heappushpop(top, base)
+                    continue
+                target = [vec[n] for n in compress(keys, mask)]
+                for i, row in zip(members, rows):
+                    if i == exclude:
+                        continue
+                    if shared < len(keys):
+                        row = compress(row, mask)
+                    closeness = 1.0 - sum(map(abs, map(sub, target, row))) / shared
+                    score = base + PARAM_WEIGHT * closeness
+                    if len(top) < k:
+                        heappush(top, score)
+                    elif score < top[0]:
+                        continue
+                    else:
+                        heappushpop(top, score)
+                    scored.append((-score, i, jaccard, closeness))
+        scored.sort()
+        return [(-score, jac, clo, self.presets[i]) for score, i, jac, clo in scored[:k]]
+
+    def find(self, name):
+        """Return the index of the first preset named `name` (case-insensitive), or None."""
+        wanted = name.strip().lower()
+        for i, info in enumerate(self.presets):
+            if info['name'].strip().lower() == wanted:
+                return i
+        return None
+
+
+def collect_files(paths):
+    """Split paths into (.hls files, .hlx files), expanding folders."""
+    hls_files, hlx_files = [], []
+    for target in paths:
+        if os.path.isdir(target):
+            hls_files += sorted(Path(target).glob('*.hls'))
+            hlx_files += sorted(Path(target).glob('*.hlx'))
+        elif target.endswith('.hls'):
+            hls_files.append(target)
+        elif target.endswith('.hlx'):
+            hlx_files.append(target)
+        else:
+            print(f"Error: {target} is not an .hlx or .hls file or a folder")
+            sys.exit(1)
+    return hls_files, hlx_files
+
+
+def main():
+    args = sys.argv[1:]
+    k = 10
+    jobs = 1
+    cache_dir = hp.DEFAULT_CACHE_DIR
+    rest = []
+    i = 0
+    while i < len(args):
+        if args[i] == '-k' and i + 1 < len(args):
+            try:
+                k = int(args[i + 1])
+            except ValueError:
+                print(f"Error: -k expects a number, got {args[i + 1]}")
+                sys.exit(1)
+            i += 2
+        elif args[i] == '--jobs' and i + 1 < len(args):
+            try:
+                jobs = int(args[i + 1]) or os.cpu_count() or 1
+            except ValueError:
+                print(f"Error: --jobs expects a number, got {args[i + 1]}")
+                sys.exit(1)
+            i += 2
+        elif args[i] == '--no-cache':
+            cache_dir = None
+            i += 1
+        else:
+            rest.append(args[i])
+            i += 1
+
+    if len(rest) < 2:
+        print("Usage: python3 helix_similar.py <preset name | preset.hlx> <library path> [...]"
+              " [-k N] [--jobs N] [--no-cache]")
+        sys.exit(1)
+    query, paths = rest[0], rest[1:]
+
+    hls_files, hlx_files = collect_files(paths)
+    presets = []
+    for kind, fp, infos, error in hp.parse_files(hls_files, hlx_files, cache_dir, jobs, params=True):
+        if error is not None:
+            print(f"Error parsing {fp}: {error}")
+            continue
+        presets.extend(infos)
+    if not presets:
+        print("No presets found in the library")
+        sys.exit(1)
+
+    index = SimilarityIndex(presets)
+    exclude = None
+    if query.endswith('.hlx') and os.path.isfile(query):
+        target = hp.parse_preset(query, params=True)
+    else:
+        exclude = index.find(query)
+        if exclude is None:
+            print(f"Error: no preset named '{query}' in the library")
+            sys.exit(1)
+        target = presets[exclude]
+
+    print(f"Presets most similar to {target['name']} ({target['file']}), "
+          f"out of {len(presets)}:\n")
+    print(f"  {'#':>3}  {'Score':>5}  {'Models':>6}  {'Params':>6}  Preset")
+    for rank, (score, jaccard, closeness, info) in enumerate(index.query(target, k, exclude), 1):
+        print(f"  {rank:3d}  {score:5.3f}  {jaccard:6.3f}  {closeness:6.3f}  "
+              f"{info['name']} ({info['file']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Check generate_latex.tex_escape() against the original chained-replace version."""
+
+import itertools
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_latex  # noqa: E402
+
+
+def reference_tex_escape(s):
+    """tex_escape() as it was before the single-pass rewrite."""
+    if not s:
+        return ""
+    # Must escape backslash first
+    s = s.replace('\\', '\\textbackslash{}')
+    replacements = [
+        ('&', '\\&'),
+        ('%', '\\%'),
+        ('$', '\\$'),
+        ('#', '\\#'),
+        ('_', '\\_'),
+        ('{', '\\{'),
+        ('}', '\\}'),
+        ('~', '\\textasciitilde{}'),
+        ('^', '\\^{}'),
+    ]
+    for old, new in replacements:
+        s = s.replace(old, new)
+    # Fix over-escaped textbackslash
+    s = s.replace('\\textbackslash\\{\\}', '\\textbackslash{}')
+    return s
+
+
+SPECIALS = '\\&%$#_{}~^'
+ALPHABET = SPECIALS + 'a '
+
+
+class TexEscapeTest(unittest.TestCase):
+
+    def assertSame(self, s):
+        self.assertEqual(generate_latex.tex_escape(s), reference_tex_escape(s), repr(s))
+
+    def test_empty(self):
+        self.assertEqual(generate_latex.tex_escape(''), '')
+        self.assertEqual(generate_latex.tex_escape(None), '')
+
+    def test_plain_text_is_unchanged(self):
+        for s in ('Brit Plexi Brt', 'US Deluxe Nrm', '1959 Super Lead', 'Ünïcödé'):
+            self.assertIs(generate_latex.tex_escape(s), s)
+
+    def test_each_special(self):
+        self.assertEqual(set(generate_latex.TEX_ESCAPES), set(SPECIALS))
+        for c in SPECIALS:
+            self.assertSame(c)
+            self.assertSame(f'a{c}b')
+
+    def test_combinations(self):
+        for n in range(1, 4):
+            for chars in itertools.product(ALPHABET, repeat=n):
+                self.assertSame(''.join(chars))
+
+    def test_all_specials_together(self):
+        for chars in itertools.permutations(SPECIALS, 4):
+            self.assertSame(''.join(chars))
+        self.assertSame(SPECIALS)
+        self.assertSame(SPECIALS[::-1])
+
+    def test_backslash_before_braces(self):
+        # The old version patched up \textbackslash{} after escaping braces
+        for s in ('\\{}', '\\{', '\\}', '{\\}', 'x\\{y}z', '\\\\{}}'):
+            self.assertSame(s)
+
+    def test_realistic_names(self):
+        for s in ('AC/DC & Friends', '100% Fuzz', 'C#m Lead', 'Amp_1 {clean}',
+                  'Cost $5 ~ approx', '2^3 Delay', 'Path\\To\\Preset'):
+            self.assertSame(s)
+
+
+if __name__ == '__main__':
+    unittest.main()